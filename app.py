@@ -1,15 +1,39 @@
 import streamlit as st
-import tempfile
+import io
 import os
-import time
 import base64
+import importlib
+import threading
 from dotenv import load_dotenv
-from app.main import run_pipeline
+# Hafif modüller; pandas / openpyxl / pyarrow çeken app.main, app.input_cache,
+# app.day_store sadece rapor üretilirken import edilir (login ekranı hızlı açılır)
+from app.profiling import PipelineProfile
+from app.job_queue import JobQueue
+from app.report_cache import MB, ReportCache, cache_key
 
 # ================== ENV ==================
 load_dotenv()
 APP_USERNAME = os.getenv("APP_USERNAME")
 APP_PASSWORD = os.getenv("APP_PASSWORD")
+REPORT_CACHE_ENTRIES = int(os.getenv("REPORT_CACHE_ENTRIES", "16"))
+REPORT_CACHE_MB = int(os.getenv("REPORT_CACHE_MB", "256"))
+INPUT_CACHE_DIR = os.getenv("INPUT_CACHE_DIR")  # boşsa parsed input cache kapalı
+INPUT_CACHE_MB = int(os.getenv("INPUT_CACHE_MB", "512"))
+EXCEL_ENGINE = os.getenv("EXCEL_ENGINE", "auto")  # auto / calamine / default
+DAY_STORE_PATH = os.getenv("DAY_STORE_PATH")  # boşsa incremental mod kapalı
+INGEST_EXECUTOR = os.getenv("INGEST_EXECUTOR", "auto")  # auto / serial / thread / process
+REPORT_STYLE = os.getenv("REPORT_STYLE", "cells")  # cells / conditional
+DHS_STREAM = os.getenv("DHS_STREAM", "0") == "1"  # çok büyük DHS exportları satır satır
+
+# Ekrandaki seçenek → run_pipeline output_format (pandas burada import edilmez)
+OUTPUT_CHOICES = {
+    "Excel report (.xlsx)": "xlsx",
+    "CSV (.csv)": "csv",
+    "Parquet (.parquet)": "parquet",
+    "JSON lines (.jsonl)": "jsonl",
+}
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))  # aynı anda çalışan rapor sayısı
+REPORT_QUEUE_MAX = int(os.getenv("REPORT_QUEUE_MAX", "20"))  # bekleyen iş sınırı
 
 # ================== PAGE CONFIG ==================
 st.set_page_config(
@@ -80,22 +104,79 @@ if "is_processing" not in st.session_state:
     st.session_state.is_processing = False
 
 # ================== HELPERS ==================
-def show_logo():
+@st.cache_resource
+def report_cache():
+    # Server process'i boyunca tüm session'lar aynı cache'i görür
+    return ReportCache(max_entries=REPORT_CACHE_ENTRIES, max_bytes=REPORT_CACHE_MB * MB)
+
+
+@st.cache_resource
+def input_cache():
+    # Aynı Procare dosyası yeni DHS ile tekrar gelirse Excel parse edilmez
+    if not INPUT_CACHE_DIR:
+        return None
+    from app.input_cache import ParsedInputCache
+    return ParsedInputCache(INPUT_CACHE_DIR, max_bytes=INPUT_CACHE_MB * MB)
+
+
+@st.cache_resource
+def day_store():
+    # Günlük çalıştırmalarda sadece değişen öğrenci-günler yeniden hesaplanır
+    if not DAY_STORE_PATH:
+        return None
+    from app.main import open_day_store
+    return open_day_store(DAY_STORE_PATH)
+
+
+@st.cache_resource
+def warm_pipeline():
+    # Login sonrası pipeline modülleri arka planda yüklenir; ilk "Generate" beklemez
+    thread = threading.Thread(
+        target=importlib.import_module, args=("app.main",), daemon=True
+    )
+    thread.start()
+    return thread
+
+
+@st.cache_resource
+def job_queue():
+    # Tüm kullanıcılar tek kuyruğu paylaşır; aynı dosyalar tek kez işlenir
+    return JobQueue(max_workers=REPORT_WORKERS, max_queued=REPORT_QUEUE_MAX)
+
+
+def show_diagnostics(summary, cached=False):
+    with st.expander("Run diagnostics"):
+        if cached:
+            st.caption("Served from cache — identical files were processed earlier.")
+        st.caption(
+            f"Total {summary['wall_seconds'] or summary['total_seconds']:.2f}s · "
+            f"slowest stage: {summary['slowest_stage']}"
+        )
+        st.dataframe(summary["stages"], use_container_width=True)
+        st.json(summary, expanded=False)
+
+
+@st.cache_resource
+def logo_html():
+    # Dosya okuma + base64 process başına bir kez; her rerun aynı string'i basar
     logo_path = os.path.join("assets", "logo.png")
     if not os.path.exists(logo_path):
-        return
+        return None
 
     with open(logo_path, "rb") as f:
         logo_b64 = base64.b64encode(f.read()).decode()
 
-    st.markdown(
-        f"""
+    return f"""
         <div style="display:flex; justify-content:center; margin-bottom:14px;">
             <img src="data:image/png;base64,{logo_b64}" width="150"/>
         </div>
-        """,
-        unsafe_allow_html=True
-    )
+        """
+
+
+def show_logo():
+    html = logo_html()
+    if html:
+        st.markdown(html, unsafe_allow_html=True)
 
 # ================== LOGIN ==================
 def login():
@@ -131,27 +212,76 @@ with col:
         st.rerun()
 
 # ================== PROGRESS ==================
-def animated_progress():
+STAGE_LABELS = {
+    "read_procare": "🐝 Reading Procare file",
+    "read_dhs": "🐝 Reading DHS file",
+    "process_procare": "⚙️ Processing Procare data",
+    "process_dhs": "⚙️ Processing DHS swipes",
+    "normalize_dhs": "⚙️ Normalizing DHS swipes",
+    "diff_store": "🗃️ Finding changed student-days",
+    "reconcile": "🧮 Reconciling attendance",
+    "dhs_only": "🧮 Checking DHS-only swipes",
+    "assemble": "📊 Assembling report",
+    "write_report": "📊 Generating report",
+}
+
+
+def generate_report(procare_bytes, dhs_bytes, key, trace_memory, output, resources, progress):
+    # Job worker thread'inde çalışır; st.* çağrısı yok
+    from app.main import run_pipeline
+
+    report_cache, input_cache, store = resources
+    output_format, include_colors = output
+    buffer = io.BytesIO()
+    profile = run_pipeline(
+        procare_bytes,
+        dhs_bytes,
+        buffer,
+        profile=PipelineProfile(trace_memory=trace_memory),
+        progress=progress,
+        input_cache=input_cache,
+        engine=EXCEL_ENGINE,
+        store=store,
+        ingest_executor=INGEST_EXECUTOR,
+        report_style=REPORT_STYLE,
+        output_format=output_format,
+        include_colors=include_colors,
+        stream_dhs=DHS_STREAM
+    )
+    report_bytes = buffer.getvalue()
+    summary = profile.to_dict()
+    report_cache.put(key, (report_bytes, summary), len(report_bytes))
+    return report_bytes, summary
+
+
+def wait_for_job(job):
+    # UI güncellemeleri sadece script thread'inde; job durumu yoklanır
     bar = st.progress(0)
     status = st.empty()
 
-    steps = [
-        ("🐝 Gathering files", 20),
-        ("⚙️ Processing data", 45),
-        ("🧮 Reconciling attendance", 70),
-        ("📊 Generating report", 90),
-        ("✅ Finalizing", 100),
-    ]
-
-    current = 0
-    for text, target in steps:
-        status.markdown(f"**{text}...**")
-        while current < target:
-            current += 1
-            bar.progress(current)
-            time.sleep(0.02)
+    while not job.wait(timeout=0.2):
+        position = job_queue().position(job)
+        if position:
+            status.markdown(f"**⏳ Waiting in queue — position {position}...**")
+            continue
+        if job.progress is None:
+            status.markdown("**🐝 Starting...**")
+            continue
+
+        stage, fraction, rows = job.progress
+        bar.progress(int(fraction * 100))
+        detail = f" ({rows:,} rows)" if rows else ""
+        status.markdown(f"**{STAGE_LABELS.get(stage, stage)}...**{detail}")
+
+    bar.progress(100)
+    status.markdown("**✅ Finalizing...**")
+
+    if job.error is not None:
+        raise job.error
+    return job.result
 
 # ================== MAIN APP ==================
+warm_pipeline()
 show_logo()
 st.markdown("<div class='card'>", unsafe_allow_html=True)
 
@@ -176,6 +306,25 @@ if dhs_file:
 
 st.markdown("<br>", unsafe_allow_html=True)
 
+trace_memory = st.checkbox(
+    "Collect memory diagnostics (slower)",
+    value=False,
+    disabled=st.session_state.is_processing
+)
+
+output_label = st.selectbox(
+    "Output format",
+    list(OUTPUT_CHOICES),
+    disabled=st.session_state.is_processing,
+    help="CSV / Parquet / JSON lines contain the reconciled table only: no banner rows, no colors."
+)
+output_format = OUTPUT_CHOICES[output_label]
+include_colors = output_format != "xlsx" and st.checkbox(
+    "Add color columns (green / red / yellow)",
+    value=False,
+    disabled=st.session_state.is_processing
+)
+
 if st.button(
     "🚀 Generate Attendance Report",
     type="primary",
@@ -188,27 +337,52 @@ if st.button(
 
     st.session_state.is_processing = True
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        animated_progress()
-
-        procare_path = os.path.join(tmpdir, "procare.xlsx")
-        dhs_path = os.path.join(tmpdir, "dhs.xlsx")
-        output_path = os.path.join(tmpdir, "final_attendance.xlsx")
-
-        with open(procare_path, "wb") as f:
-            f.write(procare_file.read())
-        with open(dhs_path, "wb") as f:
-            f.write(dhs_file.read())
-
+    from app.exports import MIME_TYPES
+    from app.main import SLOT_WINDOWS
+
+    procare_bytes = procare_file.getvalue()
+    dhs_bytes = dhs_file.getvalue()
+    output = (output_format, include_colors)
+    key = cache_key(procare_bytes, dhs_bytes, SLOT_WINDOWS, output)
+    file_name = f"final_attendance.{output_format}"
+    cached = report_cache().get(key)
+
+    if cached is not None:
+        report_bytes, summary = cached
+        st.success("Report generated!")
+        st.download_button(
+            "⬇️ Download Report",
+            data=report_bytes,
+            file_name=file_name,
+            mime=MIME_TYPES[output_format]
+        )
+        show_diagnostics(summary, cached=True)
+    else:
+        # Upload → pipeline → download tamamen bellekte; diske dosya yazılmaz
         try:
-            run_pipeline(procare_path, dhs_path, output_path)
-            with open(output_path, "rb") as f:
-                st.success("Report generated!")
-                st.download_button(
-                    "⬇️ Download Report",
-                    data=f,
-                    file_name="final_attendance.xlsx"
-                )
+            job, created = job_queue().submit(
+                key,
+                generate_report,
+                procare_bytes,
+                dhs_bytes,
+                key,
+                trace_memory,
+                output,
+                (report_cache(), input_cache(), day_store())
+            )
+            if not created:
+                st.info("The same files are already being processed — waiting for that run.")
+
+            report_bytes, summary = wait_for_job(job)
+
+            st.success("Report generated!")
+            st.download_button(
+                "⬇️ Download Report",
+                data=report_bytes,
+                file_name=file_name,
+                mime=MIME_TYPES[output_format]
+            )
+            show_diagnostics(summary)
         except Exception as e:
             st.error(str(e))
 
@@ -0,0 +1,230 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Streamlit burada import edilmez; pipeline sadece worker içinde yüklenir
+
+# ================== INPUT DISCOVERY ==================
+EXCEL_EXTENSIONS = (".xls", ".xlsx")
+PROCARE_SUFFIX = "_procare"
+DHS_SUFFIX = "_dhs"
+OUTPUT_STEM = "_final_attendance"  # + ".xlsx" / ".csv" / ".parquet" / ".jsonl"
+
+
+def _split_stem(filename):
+    stem, ext = os.path.splitext(filename)
+    if ext.lower() not in EXCEL_EXTENSIONS:
+        return None, None
+
+    lowered = stem.lower()
+    for suffix in (PROCARE_SUFFIX, DHS_SUFFIX):
+        if lowered.endswith(suffix):
+            return stem[: -len(suffix)], suffix
+    return None, None
+
+
+def find_pairs(directory):
+    # <isim>_procare.xlsx + <isim>_dhs.xlsx → (isim, procare, dhs)
+    found = {}
+    for filename in sorted(os.listdir(directory)):
+        name, kind = _split_stem(filename)
+        if name is None:
+            continue
+        found.setdefault(name, {})[kind] = os.path.join(directory, filename)
+
+    pairs = []
+    for name, files in found.items():
+        if PROCARE_SUFFIX in files and DHS_SUFFIX in files:
+            pairs.append((name, files[PROCARE_SUFFIX], files[DHS_SUFFIX]))
+        else:
+            print(f"⚠️  {name}: skipped, missing its Procare or DHS file", file=sys.stderr)
+    return pairs
+
+
+def read_manifest(path):
+    # CSV: name,procare,dhs (göreli yollar manifest klasörüne göre)
+    base = os.path.dirname(os.path.abspath(path))
+    pairs = []
+
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            procare = os.path.join(base, row["procare"].strip())
+            dhs = os.path.join(base, row["dhs"].strip())
+            name = (row.get("name") or "").strip()
+            if not name:
+                name = _split_stem(os.path.basename(procare))[0] or \
+                    os.path.splitext(os.path.basename(procare))[0]
+            pairs.append((name, procare, dhs))
+    return pairs
+
+
+# ================== WORKER ==================
+def run_pair(name, procare_path, dhs_path, output_path, profile=False,
+             input_cache_dir=None, input_cache_mb=512, engine="auto", store_dir=None,
+             ingest="auto", report_style="cells", output_format="xlsx",
+             include_colors=False, stream_dhs=False):
+    from app.input_cache import MB, ParsedInputCache
+    from app.main import open_day_store, run_pipeline
+
+    started = time.perf_counter()
+    stages = None
+    try:
+        input_cache = (
+            ParsedInputCache(input_cache_dir, max_bytes=input_cache_mb * MB)
+            if input_cache_dir else None
+        )
+        # Her çift kendi store'unu kullanır; farklı merkezlerin günleri karışmaz
+        store = open_day_store(os.path.join(store_dir, f"{name}.sqlite")) if store_dir else None
+        result = run_pipeline(
+            procare_path, dhs_path, output_path,
+            profile=profile, input_cache=input_cache, engine=engine, store=store,
+            ingest_executor=ingest, report_style=report_style,
+            output_format=output_format, include_colors=include_colors,
+            stream_dhs=stream_dhs
+        )
+        stages = result.to_dict() if result else None
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+
+    return {
+        "name": name,
+        "output": output_path,
+        "seconds": time.perf_counter() - started,
+        "error": error,
+        "profile": stages,
+    }
+
+
+# ==================================================
+# 🖥️ BATCH CLI
+# ==================================================
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m app",
+        description="Reconcile many Procare/DHS file pairs without the Streamlit UI."
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "--dir",
+        help="directory with <name>_procare.xlsx / <name>_dhs.xlsx pairs"
+    )
+    source.add_argument(
+        "--manifest",
+        help="CSV with procare,dhs columns (optional name column)"
+    )
+    parser.add_argument(
+        "-o", "--output-dir", default="reports",
+        help="where <name>_final_attendance.<format> files are written (default: reports)"
+    )
+    parser.add_argument(
+        "--format", choices=["xlsx", "csv", "parquet", "jsonl"], default="xlsx",
+        help="styled Excel report (xlsx), or the plain reconciled table without "
+             "banner rows and colors: csv, parquet (needs pyarrow) or JSON lines"
+    )
+    parser.add_argument(
+        "--colors", action="store_true",
+        help="with csv/parquet/jsonl: add Morning_Color / Afternoon_Color columns "
+             "(green / red / yellow, as in the Excel report)"
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=os.cpu_count() or 1,
+        help="number of worker processes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="print a per-stage JSON profile (time, rows, peak memory) for each pair"
+    )
+    parser.add_argument(
+        "--engine", choices=["auto", "calamine", "default"], default="auto",
+        help="Excel reader: calamine when installed (auto), or pandas' openpyxl/xlrd (default)"
+    )
+    parser.add_argument(
+        "--ingest", choices=["auto", "serial", "thread", "process"], default="auto",
+        help="how each pair reads its Procare and DHS files: auto uses threads with "
+             "calamine and reads serially otherwise or under --profile; an explicit "
+             "choice is always used (default: auto)"
+    )
+    parser.add_argument(
+        "--stream-dhs", action="store_true",
+        help="read the DHS sheet row by row and keep only one candidate per student-day slot; "
+             "memory follows student-days instead of swipes (for very large exports)"
+    )
+    parser.add_argument(
+        "--report-style", choices=["cells", "conditional"], default="cells",
+        help="color each cell (cells), or color columns D-I with conditional formatting "
+             "rules: same look, smaller file, faster to write (conditional)"
+    )
+    parser.add_argument(
+        "--store-dir", metavar="DIR",
+        help="incremental mode: keep per student-day results in DIR/<name>.sqlite "
+             "and recompute only the days whose inputs changed"
+    )
+    parser.add_argument(
+        "--input-cache", metavar="DIR",
+        help="keep parsed inputs as Parquet in DIR; unchanged files skip Excel parsing (needs pyarrow)"
+    )
+    parser.add_argument(
+        "--input-cache-mb", type=int, default=512,
+        help="size limit of the input cache, oldest entries are evicted first (default: 512)"
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    pairs = find_pairs(args.dir) if args.dir else read_manifest(args.manifest)
+    if not pairs:
+        print("No Procare/DHS pairs found.", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.store_dir:
+        os.makedirs(args.store_dir, exist_ok=True)
+    jobs = [
+        (
+            name, procare, dhs, os.path.join(args.output_dir, f"{name}{OUTPUT_STEM}.{args.format}"),
+            args.profile, args.input_cache, args.input_cache_mb, args.engine, args.store_dir,
+            args.ingest, args.report_style, args.format, args.colors, args.stream_dhs
+        )
+        for name, procare, dhs in pairs
+    ]
+
+    started = time.perf_counter()
+    results = []
+
+    if args.workers <= 1:
+        completed = (run_pair(*job) for job in jobs)
+        for result in completed:
+            _print_result(result)
+            results.append(result)
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(run_pair, *job) for job in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                _print_result(result)
+                results.append(result)
+
+    failed = [r for r in results if r["error"]]
+    print(
+        f"\n{len(results) - len(failed)} ok, {len(failed)} failed "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    for r in failed:
+        print(f"  ✗ {r['name']}: {r['error']}")
+
+    return 1 if failed else 0
+
+
+def _print_result(result):
+    status = "FAIL" if result["error"] else "ok"
+    detail = result["error"] or result["output"]
+    print(f"{status:>4}  {result['name']:<30} {result['seconds']:7.2f}s  {detail}")
+    if result["profile"]:
+        print(json.dumps({"name": result["name"], **result["profile"]}))
@@ -0,0 +1,255 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from app.timeofday import MISSING, as_minutes
+
+# ==================================================
+# 🗃️ DAY STORE (öğrenci-gün bazlı kalıcı sonuçlar, SQLite)
+# ==================================================
+# Uygulama her gün aynı ay için tekrar çalışıyor; sadece son günün DHS
+# swipe'ları değişiyor. Her (StudentID, Date) için girdilerin parmak izi,
+# Procare slotları, DHS seçimleri ve slot kararları saklanır. Yeni çalıştırma
+# sadece parmak izi değişen öğrenci-günleri yeniden hesaplar; rapor
+# saklanan satırlardan kurulur.
+KEYS = ["StudentID", "Date"]
+SLOT_TIMES = ["Morning_IN", "Morning_OUT", "Afternoon_IN", "Afternoon_OUT"]
+SLOT_RESPONSES = [f"{slot}_Response" for slot in SLOT_TIMES]
+DECISION_COLUMNS = [
+    "Full Name", "StudentID", "Date",
+    "Morning_IN", "Morning_OUT", "Morning_Response",
+    "Afternoon_IN", "Afternoon_OUT", "Afternoon_Response",
+]
+DECISION_TIMES = ["Morning_IN", "Morning_OUT", "Afternoon_IN", "Afternoon_OUT"]
+DECISION_SELECT = ", ".join(f'd."{c}"' for c in DECISION_COLUMNS)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS student_days (
+    StudentID TEXT NOT NULL,
+    Date TEXT NOT NULL,
+    procare_hash INTEGER NOT NULL,
+    dhs_hash INTEGER NOT NULL,
+    PRIMARY KEY (StudentID, Date)
+);
+CREATE TABLE IF NOT EXISTS procare_slots (
+    StudentID TEXT NOT NULL,
+    Date TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    FullName TEXT,
+    Morning_IN INTEGER, Morning_OUT INTEGER,
+    Afternoon_IN INTEGER, Afternoon_OUT INTEGER,
+    PRIMARY KEY (StudentID, Date, seq)
+);
+CREATE TABLE IF NOT EXISTS dhs_picks (
+    StudentID TEXT NOT NULL,
+    Date TEXT NOT NULL,
+    FullName TEXT,
+    Morning_IN INTEGER, Morning_OUT INTEGER,
+    Afternoon_IN INTEGER, Afternoon_OUT INTEGER,
+    Morning_IN_Response TEXT, Morning_OUT_Response TEXT,
+    Afternoon_IN_Response TEXT, Afternoon_OUT_Response TEXT,
+    PRIMARY KEY (StudentID, Date)
+);
+CREATE TABLE IF NOT EXISTS decisions (
+    StudentID TEXT NOT NULL,
+    Date TEXT NOT NULL,
+    source TEXT NOT NULL,          -- 'procare' (eşleşen) / 'dhs' (sadece DHS)
+    seq INTEGER NOT NULL,
+    "Full Name" TEXT,
+    Morning_IN INTEGER, Morning_OUT INTEGER, Morning_Response TEXT,
+    Afternoon_IN INTEGER, Afternoon_OUT INTEGER, Afternoon_Response TEXT,
+    PRIMARY KEY (StudentID, Date, source, seq)
+);
+"""
+
+
+class StoreDelta(NamedTuple):
+    days: pd.DataFrame      # değişen öğrenci-günler + yeni parmak izleri
+    procare: pd.DataFrame   # bu günlerin Procare satırları (seq kolonlu)
+    dhs: pd.DataFrame       # bu günlerin DHS seçimleri
+
+
+# ================== HELPERS ==================
+def _with_slots(frame, columns, fill):
+    missing = [c for c in columns if c not in frame.columns]
+    if missing:
+        frame = frame.assign(**{c: fill for c in missing})
+    return frame
+
+
+def _day_hashes(frame, keys, columns):
+    # Satır hash'leri gün içinde toplanır (uint64 taşması bilerek serbest);
+    # seq kolonu sayesinde satır sırası da parmak izine girer
+    rows = pd.util.hash_pandas_object(frame[columns], index=False)
+    summed = rows.groupby([frame[k] for k in keys], sort=False).sum()
+    return summed.to_numpy(dtype=np.uint64).view(np.int64), summed.index
+
+
+def _rows(frame, columns):
+    # sqlite3 numpy skalerlerini bağlayamaz; tolist() Python tiplerine çevirir
+    return list(zip(*(frame[c].tolist() for c in columns)))
+
+
+def _quoted(columns):
+    return ", ".join(f'"{c}"' for c in columns)
+
+
+# ==================================================
+# 🗃️ STORE
+# ==================================================
+class DayStore:
+    def __init__(self, path, config=None):
+        # config: slot pencereleri / processor versiyonları; değişirse store sıfırlanır
+        self.path = path
+        self.config = json.dumps(config or {}, sort_keys=True)
+
+    @contextmanager
+    def session(self):
+        # Diff → kaydet → oku tek yazma transaction'ında (eşzamanlı çalıştırmalar sıralanır)
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            conn.executescript(SCHEMA)
+            conn.execute("BEGIN IMMEDIATE")
+            session = StoreSession(conn)
+            session.check_config(self.config)
+            yield session
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+
+class StoreSession:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def check_config(self, config):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'config'").fetchone()
+        if row is not None and row[0] == config:
+            return
+
+        # Karar kuralları değişti → saklanan her şey geçersiz
+        for table in ("student_days", "procare_slots", "dhs_picks", "decisions"):
+            self.conn.execute(f"DELETE FROM {table}")
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('config', ?)", (config,))
+
+    # ---------- DIFF ----------
+    def diff(self, procare, dhs):
+        # procare: StudentID / Attdate / Full Name / slot saatleri
+        # dhs: normalize_dhs çıktısı (StudentID, Date başına tek satır)
+        procare = _with_slots(procare, SLOT_TIMES, MISSING)
+        procare = procare.assign(seq=procare.groupby(["StudentID", "Attdate"], sort=False).cumcount())
+        dhs = _with_slots(_with_slots(dhs, SLOT_TIMES, MISSING), SLOT_RESPONSES, "")
+
+        p_hash, p_keys = _day_hashes(procare, ["StudentID", "Attdate"], ["Full Name", "seq"] + SLOT_TIMES)
+        d_hash, d_keys = _day_hashes(dhs, KEYS, ["FullName"] + SLOT_TIMES + SLOT_RESPONSES)
+
+        # Olmayan taraf 0; reindex(fill_value) float'a düşmeden int64 kalır
+        p_keys, d_keys = p_keys.set_names(KEYS), d_keys.set_names(KEYS)
+        index = p_keys.append(d_keys).unique()
+        current = pd.DataFrame({
+            "procare_hash": pd.Series(p_hash, index=p_keys).reindex(index, fill_value=0),
+            "dhs_hash": pd.Series(d_hash, index=d_keys).reindex(index, fill_value=0),
+        }).reset_index()
+        stored = pd.read_sql_query(
+            "SELECT StudentID, Date, procare_hash, dhs_hash FROM student_days", self.conn
+        )
+
+        # Dört kolonun birebir eşleştiği günler değişmemiş (int64 karşılaştırma, NaN yok)
+        unchanged = pd.MultiIndex.from_frame(current.merge(stored, how="inner")[KEYS])
+        days = current[~pd.MultiIndex.from_frame(current[KEYS]).isin(unchanged)]
+
+        changed_keys = pd.MultiIndex.from_frame(days[KEYS])
+        procare_rows = procare[pd.MultiIndex.from_frame(procare[["StudentID", "Attdate"]]).isin(changed_keys)]
+        dhs_rows = dhs[pd.MultiIndex.from_frame(dhs[KEYS]).isin(changed_keys)]
+        return StoreDelta(days, procare_rows, dhs_rows)
+
+    # ---------- SAVE ----------
+    def _load_keys(self, table, frame, columns):
+        self.conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+        self.conn.execute(f"CREATE TEMP TABLE {table} ({', '.join(columns)})")
+        self.conn.executemany(
+            f"INSERT INTO temp.{table} VALUES ({', '.join('?' * len(columns))})",
+            _rows(frame, columns)
+        )
+
+    def save(self, delta, matched, unmatched):
+        # matched: match_procare(delta.procare, ...) — aynı sıra, satır satır
+        # unmatched: dhs_only_rows(delta.procare, delta.dhs)
+        self._load_keys("changed_days", delta.days, KEYS)
+        for table in ("student_days", "procare_slots", "dhs_picks", "decisions"):
+            self.conn.execute(
+                f"DELETE FROM {table} WHERE (StudentID, Date) IN "
+                f"(SELECT StudentID, Date FROM temp.changed_days)"
+            )
+
+        self.conn.executemany(
+            "INSERT INTO student_days VALUES (?, ?, ?, ?)",
+            _rows(delta.days, KEYS + ["procare_hash", "dhs_hash"])
+        )
+
+        procare = delta.procare.rename(columns={"Attdate": "Date", "Full Name": "FullName"})
+        slot_columns = KEYS + ["seq", "FullName"] + SLOT_TIMES
+        self.conn.executemany(
+            f"INSERT INTO procare_slots ({_quoted(slot_columns)}) "
+            f"VALUES ({', '.join('?' * len(slot_columns))})",
+            _rows(procare, slot_columns)
+        )
+
+        pick_columns = KEYS + ["FullName"] + SLOT_TIMES + SLOT_RESPONSES
+        self.conn.executemany(
+            f"INSERT INTO dhs_picks ({_quoted(pick_columns)}) "
+            f"VALUES ({', '.join('?' * len(pick_columns))})",
+            _rows(delta.dhs, pick_columns)
+        )
+
+        decision_columns = ["source", "seq"] + DECISION_COLUMNS
+        decisions = pd.concat([
+            matched.assign(source="procare", seq=delta.procare["seq"].to_numpy()),
+            unmatched.assign(source="dhs", seq=0),
+        ], ignore_index=True)
+        self.conn.executemany(
+            f"INSERT INTO decisions ({_quoted(decision_columns)}) "
+            f"VALUES ({', '.join('?' * len(decision_columns))})",
+            _rows(decisions, decision_columns)
+        )
+
+    # ---------- LOAD ----------
+    def _decisions(self, source, keys, key_columns):
+        self._load_keys(f"current_{source}", keys, key_columns + ["pos"])
+        seq_join = "AND d.seq = c.seq" if "seq" in key_columns else ""
+        frame = pd.read_sql_query(
+            f"SELECT {DECISION_SELECT} "
+            f"FROM temp.current_{source} c JOIN decisions d "
+            f"ON d.StudentID = c.StudentID AND d.Date = c.Date {seq_join} "
+            f"WHERE d.source = ? ORDER BY c.pos",
+            self.conn,
+            params=(source,)
+        )
+        frame[DECISION_TIMES] = as_minutes(frame[DECISION_TIMES])
+        return frame
+
+    def load(self, procare, dhs):
+        # Bu çalıştırmanın girdilerindeki öğrenci-günler; reconcile ile aynı sırada
+        procare_keys = pd.DataFrame({
+            "StudentID": procare["StudentID"].to_numpy(),
+            "Date": procare["Attdate"].to_numpy(),
+            "seq": procare.groupby(["StudentID", "Attdate"], sort=False).cumcount().to_numpy(),
+            "pos": np.arange(len(procare)),
+        })
+        dhs_keys = dhs[KEYS].assign(pos=np.arange(len(dhs)))
+
+        matched = self._decisions("procare", procare_keys, KEYS + ["seq"])
+        unmatched = self._decisions("dhs", dhs_keys, KEYS)
+        return matched, unmatched
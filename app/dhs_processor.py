@@ -1,7 +1,15 @@
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+
+from app.response_codes import FLAGS_DTYPE, SA, has_flag, response_flags
+from app.timeofday import as_minutes, from_datetimes
+
+# Çıktı şekli / anlamı değişirse artırılmalı (parsed input cache anahtarı)
+PROCESSOR_VERSION = 3
 
 # --------------------------------------------------
-# Response seçme kuralı (DEĞİŞMEDİ)
+# Response seçme kuralı (REFERANS — process_dhs vektörel uygular)
 # --------------------------------------------------
 def pick_response(series):
     # Tek kayıt varsa olduğu gibi
@@ -9,7 +17,7 @@ def pick_response(series):
         return series.iloc[0]
 
     # Birden fazla varsa ve (00) S/A varsa → onu seç
-    sa = series[series.str.contains(r"\(00\)\s*S/A", na=False)]
+    sa = series[has_flag(response_flags(series), SA)]
     if not sa.empty:
         return sa.iloc[0]
 
@@ -17,98 +25,160 @@ def pick_response(series):
     return series.iloc[0]
 
 
-def process_dhs(df_raw: pd.DataFrame) -> pd.DataFrame:
-    # --------------------------------------------------
-    # 1️⃣ DATAFRAME KOPYASI
-    # --------------------------------------------------
-    df = df_raw.copy()
-    df.columns = df.columns.str.strip()
+# Pivot kolon isimleri; kategori sırası = eski string sıralaması (groupby / pivot aynı)
+SLOT_COLUMNS = ["Afternoon_IN", "Afternoon_OUT", "Morning_IN", "Morning_OUT"]
+KEY_COLUMNS = ["Date", "StudentID", "FullName"]
+GROUP_COLUMNS = KEY_COLUMNS + ["Slot"]
 
-    # --------------------------------------------------
-    # 2️⃣ FullName ve StudentID
-    # --------------------------------------------------
-    df["FullName"] = df["Person Name"].str.strip()
-    df["StudentID"] = df["Case #"].str.strip() + "/" + df["Person"]
+# process_dhs'in okuduğu ham kolonlar (streaming ingest sadece bunları çıkarır)
+DHS_COLUMNS = ["Date Time", "Trans Type", "Case #", "Person", "Person Name", "Response"]
 
-    # --------------------------------------------------
-    # 3️⃣ DateTime parse
-    # --------------------------------------------------
-    df["DateTime"] = pd.to_datetime(df["Date Time"], errors="coerce")
-    df = df[df["DateTime"].notna()]
 
-    df["Date"] = df["DateTime"].dt.strftime("%m/%d/%Y")
-    df["Hour"] = df["DateTime"].dt.hour
-    df["Time"] = df["DateTime"].dt.strftime("%H:%M")
+def _date_labels(date_time):
+    # strftime sadece benzersiz günlere uygulanır; satırlar kategori kodu taşır
+    days = date_time.dt.normalize()
+    codes, uniques = pd.factorize(days)
+    labels = pd.Categorical.from_codes(codes, categories=uniques.strftime("%m/%d/%Y"))
+    return labels.reorder_categories(sorted(labels.categories))
 
+
+def _swipes(df_raw):
+    # Ham DHS satırları → kompakt swipe tablosu (index = ham satır konumu)
     # --------------------------------------------------
-    # 4️⃣ Morning / Afternoon
+    # 1️⃣ KOLONLAR (kopya yok, sadece gereken kolonlar)
     # --------------------------------------------------
-    df["Period"] = df["Hour"].apply(lambda x: "Morning" if x < 12 else "Afternoon")
+    source = df_raw.rename(columns=lambda c: c.strip())
 
     # --------------------------------------------------
-    # 5️⃣ Trans Type normalize (IN / OUT)
+    # 2️⃣ DateTime parse + Trans Type normalize (IN / OUT)
     # --------------------------------------------------
-    df["Trans_Clean"] = None
-    df.loc[df["Trans Type"].str.contains("IN", case=False, na=False), "Trans_Clean"] = "IN"
-    df.loc[df["Trans Type"].str.contains("OUT", case=False, na=False), "Trans_Clean"] = "OUT"
+    date_time = pd.to_datetime(source["Date Time"], errors="coerce")
 
-    # Geçersizleri at
-    df = df[df["Trans_Clean"].notna()]
+    trans = source["Trans Type"]
+    is_in = trans.str.contains("IN", case=False, na=False).to_numpy()
+    is_out = trans.str.contains("OUT", case=False, na=False).to_numpy()
 
-    # --------------------------------------------------
-    # 6️⃣ Kolon isimleri
-    # --------------------------------------------------
-    df["Time_Column"] = df["Period"] + "_" + df["Trans_Clean"]
-    df["Response_Column"] = df["Time_Column"] + "_Response"
+    # Geçersiz tarih / trans type satırları at (OUT, IN'i ezer)
+    keep = date_time.notna().to_numpy() & (is_in | is_out)
+    date_time = date_time[keep]
 
     # --------------------------------------------------
-    # 7️⃣ Zaman sırasına göre sırala
+    # 3️⃣ Kompakt swipe tablosu — tekrar eden metinler kategori
     # --------------------------------------------------
-    df = df.sort_values("DateTime")
+    # Slot: Morning / Afternoon × IN / OUT → SLOT_COLUMNS içindeki sıra
+    morning = (date_time.dt.hour < 12).to_numpy()
+    slot_codes = np.where(morning, 2, 0) + is_out[keep]
 
-    # --------------------------------------------------
-    # ⏰ Time → her zaman en erken
-    # --------------------------------------------------
-    grouped_time = (
-        df.groupby(
-            ["Date", "StudentID", "FullName", "Time_Column"]
-        )["Time"]
-        .first()
-        .reset_index()
-    )
+    df = pd.DataFrame({
+        "Date": _date_labels(date_time),
+        "StudentID": pd.Categorical(
+            (source["Case #"].str.strip() + "/" + source["Person"])[keep]
+        ),
+        "FullName": pd.Categorical(source["Person Name"].str.strip()[keep]),
+        "Slot": pd.Categorical.from_codes(slot_codes, categories=SLOT_COLUMNS),
+        "Time": from_datetimes(date_time),
+        "Response": pd.Categorical(source["Response"][keep]),
+        "DateTime": date_time,
+    })
+    # Response kodları burada bir kez parse edilir (benzersiz cevap başına)
+    df["Flags"] = response_flags(df["Response"])
+    return df
 
+
+def pivot_swipes(df):
     # --------------------------------------------------
-    # 📨 Response → (00) S/A kuralı
+    # 4️⃣ Zaman sırasına göre sırala (tek sort)
     # --------------------------------------------------
-    grouped_response = (
-        df.groupby(
-            ["Date", "StudentID", "FullName", "Response_Column"]
-        )["Response"]
-        .apply(pick_response)
-        .reset_index()
-    )
+    # Stable: eşit saatte dosyadaki sıra korunur (streaming yolu ile aynı seçim)
+    df = df.sort_values("DateTime", kind="stable").drop(columns="DateTime")
 
     # --------------------------------------------------
-    # 8️⃣ Pivot
+    # 5️⃣ Tek grouped geçiş: en erken satır + (00) S/A kuralı (pick_response)
     # --------------------------------------------------
-    time_pivot = grouped_time.pivot(
-        index=["Date", "StudentID", "FullName"],
-        columns="Time_Column",
-        values="Time"
-    )
-
-    response_pivot = grouped_response.pivot(
-        index=["Date", "StudentID", "FullName"],
-        columns="Response_Column",
-        values="Response"
-    )
+    # first: grubun ilk satırı → Time (her zaman en erken)
+    # pick:  S/A'lı ilk satır, yoksa ilk satır → Response / Flags
+    #        (S/A olmayan satırlar n kaydırılır; min önce S/A'ları görür)
+    n = len(df)
+    position = np.arange(n)
+    sa = has_flag(df["Flags"].to_numpy(), SA)
+    picks = pd.DataFrame(
+        {"first": position, "pick": np.where(sa, position, position + n)}, index=df.index
+    ).groupby([df[k] for k in GROUP_COLUMNS], observed=True).min()
+
+    first = picks["first"].to_numpy()
+    pick = picks["pick"].to_numpy() % max(n, 1)
+
+    long = pd.DataFrame({
+        "Time": df["Time"].to_numpy()[first],
+        "Response": np.asarray(df["Response"], dtype=object)[pick],
+        "Flags": df["Flags"].to_numpy()[pick],
+    }, index=picks.index)
+    del df, position, sa, picks, first, pick
 
     # --------------------------------------------------
-    # 9️⃣ Birleştir
+    # 6️⃣ Tek reshape (kategori → string sadece özet satırlarda)
     # --------------------------------------------------
-    final_df = pd.concat([time_pivot, response_pivot], axis=1).reset_index()
-    final_df.columns.name = None
+    wide = long.unstack("Slot")
+    slots = [s for s in SLOT_COLUMNS if s in set(long.index.get_level_values("Slot"))]
+
+    columns = {
+        **{slot: as_minutes(wide[("Time", slot)]) for slot in slots},
+        **{f"{slot}_Response": wide[("Response", slot)] for slot in slots},
+        **{f"{slot}_Flags": wide[("Flags", slot)].fillna(0).astype(FLAGS_DTYPE) for slot in slots},
+    }
+    # Hiç swipe yoksa sadece anahtar kolonları
+    final_df = (pd.concat(columns, axis=1) if columns else pd.DataFrame(index=wide.index)).reset_index()
+    for col in KEY_COLUMNS:
+        final_df[col] = final_df[col].astype(object)
 
     final_df = final_df.sort_values(by="FullName").reset_index(drop=True)
 
     return final_df
+
+
+def process_dhs(df_raw: pd.DataFrame) -> pd.DataFrame:
+    return pivot_swipes(_swipes(df_raw))
+
+
+# ==================================================
+# 🌊 STREAMING (chunk chunk katlama, sınırlı bellek)
+# ==================================================
+# pivot_swipes bir grupta sadece iki satıra bakar: en erken swipe (Time ve
+# S/A yoksa Response) ve en erken S/A swipe'ı. Her chunk'tan sonra sadece bu
+# adaylar tutulur; bellek ham satır sayısına değil öğrenci-gün sayısına bağlı.
+def _candidates(df):
+    # Dosya sırasındaki swipe'lar → her grubun en erken ve en erken S/A satırı
+    ordered = df.sort_values("DateTime", kind="stable")
+    keep = ~ordered.duplicated(GROUP_COLUMNS).to_numpy()
+
+    sa = has_flag(ordered["Flags"], SA).to_numpy()
+    keep[sa] |= ~ordered[sa].duplicated(GROUP_COLUMNS).to_numpy()
+
+    # Dosya sırasına geri dön: sonraki chunk'larla eşit saatlerde sıra korunur
+    return ordered[keep].sort_index()
+
+
+def _concat_swipes(frames):
+    # Chunk'ların kategorileri farklı; birleşik kategoriler sıralı (process_dhs ile aynı)
+    columns = {}
+    for column in frames[0].columns:
+        parts = [frame[column] for frame in frames]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            columns[column] = union_categoricals(parts, sort_categories=True)
+        else:
+            columns[column] = pd.concat(parts).to_numpy()
+    index = frames[0].index.append([frame.index for frame in frames[1:]])
+    return pd.DataFrame(columns, index=index)
+
+
+def fold_swipes(chunks):
+    # chunks: ham DHS DataFrame parçaları (readers.iter_dhs_chunks) → (adaylar, okunan satır)
+    state, rows = None, 0
+    for chunk in chunks:
+        chunk.index = pd.RangeIndex(rows, rows + len(chunk))
+        rows += len(chunk)
+
+        swipes = _swipes(chunk)
+        state = swipes if state is None else _concat_swipes([state, swipes])
+        state = _candidates(state)
+    return state, rows
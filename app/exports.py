@@ -0,0 +1,79 @@
+import io
+
+from app.report_writer import COLOR_MAP, GREEN, RED, REPORT_COLUMNS, TIME_COLUMNS, YELLOW
+from app.timeofday import format_minutes
+
+# ==================================================
+# 📤 STİLSİZ TABLO ÇIKTILARI (CSV / PARQUET / JSON LINES)
+# ==================================================
+# Faturalama tarafı renklere bakmıyor; uzlaştırılmış tablo openpyxl'e hiç
+# uğramadan bellekteki DataFrame'den yazılır. Procare banner satırları yok,
+# sadece header + data. Renk istenirse slot başına düz bir kolon eklenir.
+OUTPUT_FORMATS = ("xlsx", "csv", "parquet", "jsonl")
+
+EXTENSIONS = {
+    "xlsx": ".xlsx",
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "jsonl": ".jsonl",
+}
+
+MIME_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "jsonl": "application/jsonl",
+}
+
+FILL_NAMES = {id(GREEN): "green", id(RED): "red", id(YELLOW): "yellow"}
+
+# Response → Excel raporundaki Response hücresinin rengi
+RESPONSE_COLORS = {response: FILL_NAMES[id(fill)] for response, fill in COLOR_MAP.items()}
+
+COLOR_COLUMNS = {
+    "Morning_Color": "Morning_Response",
+    "Afternoon_Color": "Afternoon_Response",
+}
+
+
+def export_frame(df, colors=False):
+    # assemble_report çıktısı → rapor kolonları, saatler "HH:MM" (eksik → boş)
+    table = df[REPORT_COLUMNS].copy()
+    for c in TIME_COLUMNS:
+        text = format_minutes(table[c])
+        table[c] = text.where(text != "", None).to_numpy()
+
+    if colors:
+        for column, response in COLOR_COLUMNS.items():
+            table[column] = table[response].map(RESPONSE_COLORS)
+    return table
+
+
+def write_table(df, output_file, output_format, colors=False):
+    # output_file: yol veya yazılabilir (binary) file-like
+    if output_format not in OUTPUT_FORMATS or output_format == "xlsx":
+        raise ValueError(
+            f"Unknown table format {output_format!r}; expected one of "
+            f"{', '.join(f for f in OUTPUT_FORMATS if f != 'xlsx')}"
+        )
+
+    table = export_frame(df, colors)
+
+    if output_format == "parquet":
+        table.to_parquet(output_file, index=False)
+        return
+
+    if output_format == "csv":
+        text = table.to_csv(index=False)
+    else:
+        text = table.to_json(orient="records", lines=True, force_ascii=False)
+        if text and not text.endswith("\n"):
+            text += "\n"
+
+    if isinstance(output_file, (str, bytes)) or hasattr(output_file, "__fspath__"):
+        with open(output_file, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+    elif isinstance(output_file, io.TextIOBase):
+        output_file.write(text)
+    else:
+        output_file.write(text.encode("utf-8"))
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow yoksa cache sessizce devre dışı
+    pa = None
+    pq = None
+
+# ==================================================
+# 💾 PARSED INPUT CACHE (dosya hash'i → işlenmiş DataFrame, Parquet)
+# ==================================================
+# Aynı ayın Procare exportu her gün yeni DHS dosyasıyla tekrar çalıştırılıyor;
+# Excel parse'ı en pahalı kısım. process_procare / process_dhs çıktıları
+# kaynak dosyanın hash'i + processor versiyonu ile diske yazılır.
+MB = 1024 * 1024
+SUFFIX = ".parquet"
+EXTRA_KEY = b"attendance_extra"
+
+
+def parquet_available():
+    return pq is not None
+
+
+def source_key(kind, source_bytes, version):
+    digest = hashlib.sha256()
+    digest.update(f"{kind}:{version}:".encode())
+    digest.update(source_bytes)
+    return f"{kind}-{digest.hexdigest()}"
+
+
+class ParsedInputCache:
+    def __init__(self, directory, max_bytes=512 * MB):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = parquet_available()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.enabled:
+            os.makedirs(directory, exist_ok=True)
+
+    def __getstate__(self):
+        # ProcessPoolExecutor'a gönderilebilsin (lock taşınmaz)
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def get(self, key):
+        # (DataFrame, extra) ya da None
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            table = pq.read_table(path)
+        except (FileNotFoundError, OSError, pa.ArrowException):
+            # Yok ya da yarım yazılmış → parse edilip yeniden yazılır
+            with self._lock:
+                self.misses += 1
+            return None
+
+        metadata = table.schema.metadata or {}
+        extra = json.loads(metadata.get(EXTRA_KEY, b"null"))
+
+        # Eviction sırası: en eski kullanılan önce
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return table.to_pandas(), extra
+
+    def put(self, key, frame, extra=None):
+        if not self.enabled:
+            return
+
+        try:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+        except (pa.ArrowException, TypeError, ValueError):
+            # Karışık tipli kolon vb. → bu dosya cache'lenmez, pipeline etkilenmez
+            return
+        metadata = dict(table.schema.metadata or {})
+        metadata[EXTRA_KEY] = json.dumps(extra, default=str).encode()
+        table = table.replace_schema_metadata(metadata)
+
+        # Önce geçici dosyaya, sonra atomik rename (paralel CLI worker'ları)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        self.evict()
+
+    def evict(self):
+        # Boyut sınırı aşılırsa en eski erişilen dosyalar silinir
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    @property
+    def size_bytes(self):
+        return sum(
+            os.path.getsize(os.path.join(self.directory, name))
+            for name in os.listdir(self.directory)
+            if name.endswith(SUFFIX)
+        ) if self.enabled else 0
+
+
+# ================== PROCARE BANNER ==================
+def banner_to_json(top_rows):
+    return [[None if pd.isna(v) else v for v in row] for row in top_rows.itertuples(index=False)]
+
+
+def banner_from_json(rows):
+    return pd.DataFrame(rows)
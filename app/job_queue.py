@@ -0,0 +1,99 @@
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ==================================================
+# 🚦 REPORT JOB QUEUE (process geneli, sınırlı worker)
+# ==================================================
+# Streamlit her session'ı ayrı script thread'inde çalıştırır; herkes kendi
+# run_pipeline'ını başlatırsa CPU / bellek patlar. Tüm session'lar bu kuyruğu
+# paylaşır (st.cache_resource): en fazla max_workers iş aynı anda çalışır,
+# aynı anahtarla gelen iş zaten kuyruktaysa / çalışıyorsa ona bağlanılır.
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+class Job:
+    def __init__(self, key, seq):
+        self.key = key
+        self.seq = seq
+        self.status = QUEUED
+        self.progress = None    # (stage, fraction, rows) — son rapor
+        self.result = None
+        self.error = None
+        self.submitters = 1
+        self._done = threading.Event()
+
+    def report(self, stage, fraction, rows):
+        # run_pipeline progress callback'i (worker thread'inden)
+        self.progress = (stage, fraction, rows)
+
+    @property
+    def finished(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+
+class JobQueue:
+    def __init__(self, max_workers=2, max_queued=None):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-job")
+        self._lock = threading.Lock()
+        self._active = {}  # key → Job (kuyrukta / çalışıyor)
+        self._seq = itertools.count()
+
+    def submit(self, key, fn, *args, **kwargs):
+        # fn(*args, progress=job.report, **kwargs); → (job, yeni_mi)
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                job.submitters += 1
+                return job, False
+
+            if self.max_queued is not None and self._count(QUEUED) >= self.max_queued:
+                raise QueueFull("Too many reports are waiting. Please try again in a minute.")
+
+            job = Job(key, next(self._seq))
+            self._active[key] = job
+
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job, True
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        try:
+            job.result = fn(*args, progress=job.report, **kwargs)
+            job.status = DONE
+        except Exception as e:
+            job.error = e
+            job.status = FAILED
+        finally:
+            with self._lock:
+                self._active.pop(job.key, None)
+            job._done.set()
+
+    def _count(self, status):
+        return sum(1 for job in self._active.values() if job.status == status)
+
+    def position(self, job):
+        # 0 = çalışıyor / bitti, n = kuyrukta n. sırada
+        with self._lock:
+            if job.status != QUEUED:
+                return 0
+            return 1 + sum(
+                1 for other in self._active.values()
+                if other.status == QUEUED and other.seq < job.seq
+            )
+
+    def stats(self):
+        with self._lock:
+            return {"running": self._count(RUNNING), "queued": self._count(QUEUED)}
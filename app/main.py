@@ -1,84 +1,533 @@
+import io
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
-from openpyxl.styles import Font
 
 # from procare_processor import process_procare
 # from dhs_processor import process_dhs
 
-from app.procare_processor import process_procare
-from app.dhs_processor import process_dhs
-
-# ================== COLORS ==================
-GREEN = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-RED = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-YELLOW = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
-
-COLOR_MAP = {
-    "Swiped": GREEN,
-    "Not Swiped": RED,
-    "Void Transaction": YELLOW,
-    "Void & Update Transaction": YELLOW,
-    "Inform Parent": YELLOW,
-    "Update Procare": YELLOW,
-    "Not Swiped IN": RED,
-    "Not Swiped OUT": RED,
-    "Not Swiped BOTH": RED
-}
+from app.procare_processor import PROCESSOR_VERSION as PROCARE_VERSION, process_procare
+from app.profiling import PipelineProfile
+from app.dhs_processor import (
+    DHS_COLUMNS, PROCESSOR_VERSION as DHS_VERSION, fold_swipes, pivot_swipes, process_dhs
+)
+from app.day_store import DayStore
+from app.exports import OUTPUT_FORMATS, write_table
+from app.input_cache import banner_from_json, banner_to_json, source_key
+from app.readers import engine_label, iter_dhs_chunks, load_dhs, load_procare, source_bytes
+from app.report_writer import COLOR_MAP, GREEN, RED, YELLOW, write_report
+from app.response_codes import (
+    ALL_FLAGS, B4, CARD_NOT_ACTIVE, DD, FLAGS_DTYPE, RESPONDED, SA, has_flag
+)
+from app.timeofday import MISSING, as_minutes, parse_hhmm
 
 # ================== TIME HELPERS ==================
-def not_swiped_reason(p_in, p_out):
-    if not p_in and p_out:
+# Saatler gece yarısından dakika (int), eksik = MISSING
+def has_time(t):
+    return t != MISSING
+
+def not_swiped_reason(d_in, d_out):
+    if not has_time(d_in) and has_time(d_out):
         return "Not Swiped IN"
-    if p_in and not p_out:
+    if has_time(d_in) and not has_time(d_out):
         return "Not Swiped OUT"
     return "Not Swiped BOTH"
-def parse_time(t):
-    try:
-        return datetime.strptime(t, "%H:%M").time()
-    except:
-        return None
 
 def in_range(t, start, end):
-    t = parse_time(t)
-    return bool(t) and start <= t <= end
+    return has_time(t) and start <= t <= end
 
-# ================== RESPONSE HELPERS ==================
-def is_sa(resp): return bool(resp) and "(00) S/A" in resp
-def is_b4(resp): return bool(resp) and "(B4)" in resp
-def is_dd(resp): return bool(resp) and "(DD)" in resp
-def is_card_not_active(resp): return bool(resp) and "Card Not Active" in resp
+# ================== DHS TIME PICKER (REFERANS) ==================
+# Tek (StudentID, Date) grubu için satır satır kural; normalize_dhs ile birebir
+# aynı sonucu verir (tests/test_reference_rules.py)
+def pick_time_dhs(df, time_col, flags_col, pick):
+    df = df[~has_flag(df[flags_col], CARD_NOT_ACTIVE)]
 
-# ================== DHS TIME PICKER ==================
-def pick_time_dhs(df, time_col, resp_col, pick):
+    # S/A varsa sadece S/A, yoksa B4 kayıtları
+    source = df[has_flag(df[flags_col], SA)]
+    if source.empty:
+        source = df[has_flag(df[flags_col], B4)]
 
-    df = df[~df[resp_col].apply(is_card_not_active)]
+    times = [t for t in source[time_col] if has_time(t)]
+    if not times:
+        return MISSING
 
-    sa = df[df[resp_col].apply(is_sa)]
-    source = sa if not sa.empty else None
+    return min(times) if pick == "min" else max(times)
 
-    if source is None:
-        b4 = df[df[resp_col].apply(is_b4)]
-        source = b4 if not b4.empty else None
+# ================== SLOT WINDOWS ==================
+MORNING_START = parse_hhmm("06:00")
+MORNING_END   = parse_hhmm("07:50")
+AFTER_START   = parse_hhmm("15:00")
+AFTER_END     = parse_hhmm("18:30")
+
+SLOT_WINDOWS = {
+    "Morning": (MORNING_START, MORNING_END),
+    "Afternoon": (AFTER_START, AFTER_END),
+}
 
-    if source is None or source.empty:
-        return ""
+# ================== VECTOR HELPERS ==================
+def _in_range_mask(times, start, end):
+    return (times != MISSING) & times.between(start, end)
+
+
+def _or_flags(df, col):
+    # Grup içi bit OR — " | " ile birleştirilen cevaplarda herhangi birinde olan kod
+    keys = [df[k] for k in DHS_KEYS]
+    combined = 0
+    for bit in ALL_FLAGS:
+        combined = combined + has_flag(df[col], bit).groupby(keys, sort=True).any() * bit
+    return combined.astype(FLAGS_DTYPE)
+
+
+# ================== DHS NORMALIZE (VEKTÖREL) ==================
+# pick_time_dhs'in tüm (StudentID, Date) grupları için tek seferde hali
+DHS_KEYS = ["StudentID", "Date"]
+DHS_SLOTS = [
+    ("Morning_IN", "min"),
+    ("Morning_OUT", "max"),
+    ("Afternoon_IN", "min"),
+    ("Afternoon_OUT", "max"),
+]
+
+
+def _join_unique(df, col):
+    # " | ".join(g[col].unique()) — tek değerli gruplar join'e hiç girmez
+    dedup = df.drop_duplicates(subset=DHS_KEYS + [col])
+    multi = dedup.duplicated(subset=DHS_KEYS, keep=False)
+
+    joined = dedup.loc[~multi].set_index(DHS_KEYS)[col]
+    if multi.any():
+        joined = pd.concat([
+            joined,
+            dedup.loc[multi].groupby(DHS_KEYS, sort=False)[col].agg(" | ".join)
+        ])
+    return joined
+
+
+def normalize_dhs(dhs_raw):
+    df = dhs_raw.copy()
+    for slot, _ in DHS_SLOTS:
+        if slot not in df.columns:
+            df[slot] = MISSING
+        if f"{slot}_Response" not in df.columns:
+            df[f"{slot}_Response"] = ""
+        if f"{slot}_Flags" not in df.columns:
+            df[f"{slot}_Flags"] = FLAGS_DTYPE(0)
+
+    groups = df.groupby(DHS_KEYS, sort=True)
+    out = groups["FullName"].first().to_frame()
+
+    for slot, pick in DHS_SLOTS:
+        flags = df[f"{slot}_Flags"]
+        card_not_active = has_flag(flags, CARD_NOT_ACTIVE)
+        sa = ~card_not_active & has_flag(flags, SA)
+        b4 = ~card_not_active & has_flag(flags, B4)
+
+        # Grupta S/A varsa sadece S/A, yoksa B4 kayıtları
+        group_has_sa = sa.groupby([df[k] for k in DHS_KEYS]).transform("any")
+        source = sa.where(group_has_sa, b4)
+
+        minutes = df[slot].where(source & (df[slot] != MISSING))
+        picked = minutes.groupby([df[k] for k in DHS_KEYS], sort=True).agg(pick)
+        out[slot] = as_minutes(picked)
+
+    for slot, _ in DHS_SLOTS:
+        col = f"{slot}_Response"
+        out[col] = _join_unique(df, col).reindex(out.index)
+        out[f"{slot}_Flags"] = _or_flags(df, f"{slot}_Flags")
+
+    return out.reset_index()
+
+
+# ================== SLOT LOGIC (REFERANS) ==================
+# Tek satırlık karar mantığı; classify_slot ile birebir aynı sonucu verir
+# (tests/test_reference_rules.py). Kural değişirse ikisi birlikte değişir.
+def process_slot(p_row, d_row, slot, start, end):
+    p_in = p_row.get(f"{slot}_IN", MISSING)
+    p_out = p_row.get(f"{slot}_OUT", MISSING)
+
+    d_in = d_out = MISSING
+    flags = []
+    if d_row is not None:
+        d_in = d_row.get(f"{slot}_IN", MISSING)
+        d_out = d_row.get(f"{slot}_OUT", MISSING)
+        flags = [
+            int(d_row.get(f"{slot}_IN_Flags", 0)),
+            int(d_row.get(f"{slot}_OUT_Flags", 0)),
+        ]
+
+    final_in = p_in if has_time(p_in) else d_in
+    final_out = p_out if has_time(p_out) else d_out
+
+    has_procare_any = has_time(p_in) or has_time(p_out)
+    has_procare_complete = has_time(p_in) and has_time(p_out)
+    has_dhs_any = has_time(d_in) or has_time(d_out)
+    has_dhs_complete = has_time(d_in) and has_time(d_out)
+
+    if not has_procare_any:
+        if has_dhs_any:
+            return "Void Transaction", YELLOW, final_in, final_out
+        return "", None, MISSING, MISSING
+
+    if has_time(p_in) and not has_time(p_out) and has_dhs_complete:
+        return "Update Procare", YELLOW, final_in, final_out
+
+    if has_procare_any and not has_procare_complete:
+        if has_dhs_any:
+            return "Void Transaction", YELLOW, final_in, final_out
+
+        return not_swiped_reason(d_in, d_out), RED, final_in, final_out
+
+    # Cevabı olan her swipe (DD) ise sayılmaz
+    if all(has_flag(f, DD) for f in flags if has_flag(f, RESPONDED)):
+        return not_swiped_reason(d_in, d_out), RED, final_in, final_out
+
+    if not has_dhs_complete:
+        return not_swiped_reason(d_in, d_out), RED, final_in, final_out
+
+    valid = in_range(p_in, start, end) and in_range(p_out, start, end)
+
+    if valid:
+        if any(has_flag(f, B4) for f in flags):
+            return "Inform Parent", YELLOW, final_in, final_out
+        return "Swiped", GREEN, final_in, final_out
+
+    return "Void & Update Transaction", YELLOW, final_in, final_out
+
+# ================== SLOT ENGINE (VEKTÖREL) ==================
+def classify_slot(frame, slot, start, end):
+    # frame: Procare slot kolonları + DHS eşleşmesi (d_ önekli, *_Flags dahil)
+    # eksik saat → MISSING, eksik cevap → flag 0
+    def times(name):
+        if name in frame.columns:
+            return as_minutes(frame[name])
+        return pd.Series(MISSING, index=frame.index)
+
+    def flags(name):
+        # Eşleşmeyen DHS satırı → 0 (cevap yok)
+        if name in frame.columns:
+            return frame[name].fillna(0).astype(FLAGS_DTYPE)
+        return pd.Series(FLAGS_DTYPE(0), index=frame.index)
+
+    p_in, p_out = times(f"{slot}_IN"), times(f"{slot}_OUT")
+    d_in, d_out = times(f"d_{slot}_IN"), times(f"d_{slot}_OUT")
+    f_in, f_out = flags(f"d_{slot}_IN_Flags"), flags(f"d_{slot}_OUT_Flags")
+
+    has_p_in, has_p_out = p_in != MISSING, p_out != MISSING
+    has_d_in, has_d_out = d_in != MISSING, d_out != MISSING
+
+    has_procare_any = has_p_in | has_p_out
+    has_procare_complete = has_p_in & has_p_out
+    has_dhs_any = has_d_in | has_d_out
+    has_dhs_complete = has_d_in & has_d_out
+
+    not_swiped = np.select(
+        [~has_d_in & has_d_out, has_d_in & ~has_d_out],
+        ["Not Swiped IN", "Not Swiped OUT"],
+        "Not Swiped BOTH"
+    )
+
+    all_dd = (
+        (~has_flag(f_in, RESPONDED) | has_flag(f_in, DD))
+        & (~has_flag(f_out, RESPONDED) | has_flag(f_out, DD))
+    )
+    any_b4 = has_flag(f_in, B4) | has_flag(f_out, B4)
+    valid = _in_range_mask(p_in, start, end) & _in_range_mask(p_out, start, end)
+
+    # process_slot ile aynı öncelik sırası
+    response = np.select(
+        [
+            ~has_procare_any & has_dhs_any,
+            ~has_procare_any,
+            has_p_in & ~has_p_out & has_dhs_complete,
+            ~has_procare_complete & has_dhs_any,
+            ~has_procare_complete,
+            all_dd,
+            ~has_dhs_complete,
+            valid & any_b4,
+            valid,
+        ],
+        [
+            "Void Transaction",
+            "",
+            "Update Procare",
+            "Void Transaction",
+            not_swiped,
+            not_swiped,
+            not_swiped,
+            "Inform Parent",
+            "Swiped",
+        ],
+        "Void & Update Transaction"
+    )
+
+    final_in = p_in.where(has_p_in, d_in)
+    final_out = p_out.where(has_p_out, d_out)
+
+    return pd.Series(response, index=frame.index), final_in, final_out
+
+
+def slot_colors(responses):
+    return [COLOR_MAP.get(r) for r in responses]
+
+
+# ================== RECONCILIATION ==================
+def match_procare(procare, dhs):
+    # ---------- KEYED JOIN (StudentID, Date) ----------
+    d_cols = {c: f"d_{c}" for c in dhs.columns if c not in DHS_KEYS}
+    joined = procare.merge(
+        dhs.rename(columns=d_cols),
+        how="left",
+        left_on=["StudentID", "Attdate"],
+        right_on=DHS_KEYS,
+        suffixes=("", "_dhs")
+    )
+
+    m_resp, m_in, m_out = classify_slot(joined, "Morning", MORNING_START, MORNING_END)
+    a_resp, a_in, a_out = classify_slot(joined, "Afternoon", AFTER_START, AFTER_END)
+
+    return pd.DataFrame({
+        "Full Name": joined["Full Name"],
+        "StudentID": joined["StudentID"],
+        "Date": joined["Attdate"],
+        "Morning_IN": m_in,
+        "Morning_OUT": m_out,
+        "Morning_Response": m_resp,
+        "Afternoon_IN": a_in,
+        "Afternoon_OUT": a_out,
+        "Afternoon_Response": a_resp,
+    })
+
+
+def dhs_only_rows(procare, dhs):
+    # ---------- DHS ONLY (ORİJİNAL DAVRANIŞ KORUNDU) ----------
+    procare_keys = pd.MultiIndex.from_frame(procare[["StudentID", "Attdate"]])
+    dhs_only = dhs[~pd.MultiIndex.from_frame(dhs[DHS_KEYS]).isin(procare_keys)]
+
+    has_morning = (dhs_only["Morning_IN"] != MISSING) | (dhs_only["Morning_OUT"] != MISSING)
+    has_afternoon = (dhs_only["Afternoon_IN"] != MISSING) | (dhs_only["Afternoon_OUT"] != MISSING)
+
+    return pd.DataFrame({
+        "Full Name": dhs_only["FullName"],
+        "StudentID": dhs_only["StudentID"],
+        "Date": dhs_only["Date"],
+        "Morning_IN": dhs_only["Morning_IN"].where(has_morning, MISSING),
+        "Morning_OUT": dhs_only["Morning_OUT"].where(has_morning, MISSING),
+        "Morning_Response": np.where(has_morning, "Void Transaction", ""),
+        "Afternoon_IN": dhs_only["Afternoon_IN"].where(has_afternoon, MISSING),
+        "Afternoon_OUT": dhs_only["Afternoon_OUT"].where(has_afternoon, MISSING),
+        "Afternoon_Response": np.where(has_afternoon, "Void Transaction", ""),
+    })
+
+
+def assemble_report(matched, unmatched):
+    df = pd.concat([matched, unmatched], ignore_index=True)
+    df = df.sort_values(by="Full Name", kind="stable").reset_index(drop=True)
 
-    times = [parse_time(t) for t in source[time_col] if t]
-    times = [t for t in times if t]
+    df["M_Color"] = slot_colors(df["Morning_Response"])
+    df["A_Color"] = slot_colors(df["Afternoon_Response"])
+
+    return df
+
+
+# ================== INCREMENTAL STORE ==================
+# Karar kuralları (classify_slot / dhs_only_rows) değişirse artırılmalı
+RULES_VERSION = 1
+
+
+def open_day_store(path):
+    # Slot pencereleri / versiyonlar değişirse saklanan kararlar geçersiz sayılır
+    return DayStore(path, config={
+        "windows": SLOT_WINDOWS,
+        "rules": RULES_VERSION,
+        "procare": PROCARE_VERSION,
+        "dhs": DHS_VERSION,
+    })
+
+# ================== STAGES ==================
+# Progress bar ağırlıkları (benchmark'taki tipik süre payları)
+STAGE_WEIGHTS = {
+    "read_procare": 8,
+    "read_dhs": 30,
+    "process_procare": 4,
+    "process_dhs": 12,
+    "normalize_dhs": 3,
+    "reconcile": 2,
+    "dhs_only": 1,
+    "assemble": 1,
+    "write_report": 39,
+}
 
-    if not times:
-        return ""
+# ==================================================
+# 📥 INPUTS (PARSED INPUT CACHE İLE)
+# ==================================================
+def _cache_key(input_cache, kind, source, version):
+    # Cache yoksa kaynak olduğu gibi kalır; varsa bytes'a çevrilip hash'lenir
+    if input_cache is None or not input_cache.enabled:
+        return source, None
+    source = source_bytes(source)
+    return source, source_key(kind, source, version)
+
+
+def _cached_stages(profile, hit, *stages):
+    # Cache hit: parse + process atlanır, aşamalar yine de raporlanır
+    for name in stages:
+        with profile.stage(name, rows_in=len(hit)) as rec:
+            rec["cached"] = True
+            rec["rows_out"] = len(hit)
+
+
+def load_procare_input(procare_file, profile, input_cache=None, engine="auto"):
+    procare_file, key = _cache_key(input_cache, "procare", procare_file, PROCARE_VERSION)
+    hit = input_cache.get(key) if key else None
+    if hit is not None:
+        procare, banner = hit
+        _cached_stages(profile, procare, "read_procare", "process_procare")
+        return procare, banner_from_json(banner)
+
+    with profile.stage("read_procare") as rec:
+        procare_book = load_procare(procare_file, engine)
+        rec["engine"] = engine_label(engine)
+        # Sadece Excel parse'ı (banner / header ayrıştırması hariç)
+        rec["parse_seconds"] = round(procare_book.parse_seconds, 4)
+        rec["rows_out"] = len(procare_book.data)
+
+    with profile.stage("process_procare", rows_in=len(procare_book.data)) as rec:
+        procare = process_procare(procare_book.data, procare_book.header_text).fillna("")
+        rec["rows_out"] = len(procare)
+
+    if key:
+        input_cache.put(key, procare, banner_to_json(procare_book.top_rows))
+    return procare, procare_book.top_rows
+
+
+def load_dhs_input(dhs_file, profile, input_cache=None, engine="auto", stream=False):
+    # stream=True → sheet satır satır okunup katlanır; tüm sheet hiç DataFrame olmaz
+    dhs_file, key = _cache_key(input_cache, "dhs", dhs_file, DHS_VERSION)
+    hit = input_cache.get(key) if key else None
+    if hit is not None:
+        dhs_raw, _ = hit
+        _cached_stages(profile, dhs_raw, "read_dhs", "process_dhs")
+        return dhs_raw
+
+    if stream:
+        return _stream_dhs_input(dhs_file, profile, input_cache, engine, key)
+
+    with profile.stage("read_dhs") as rec:
+        df_dhs_raw = load_dhs(dhs_file, engine)
+        rec["engine"] = engine_label(engine)
+        rec["rows_out"] = len(df_dhs_raw)
+
+    with profile.stage("process_dhs", rows_in=len(df_dhs_raw)) as rec:
+        dhs_raw = process_dhs(df_dhs_raw).fillna("")
+        rec["rows_out"] = len(dhs_raw)
+
+    if key:
+        input_cache.put(key, dhs_raw)
+    return dhs_raw
+
+
+def _stream_dhs_input(dhs_file, profile, input_cache, engine, key):
+    # read_dhs: okuma + katlama (öğrenci-gün-slot başına en fazla iki aday satır)
+    with profile.stage("read_dhs") as rec:
+        candidates, rows = fold_swipes(iter_dhs_chunks(dhs_file, engine, DHS_COLUMNS))
+        rec["engine"] = engine_label(engine)
+        rec["streamed"] = True
+        rec["rows_out"] = rows
+
+    with profile.stage("process_dhs", rows_in=len(candidates)) as rec:
+        dhs_raw = pivot_swipes(candidates).fillna("")
+        rec["rows_out"] = len(dhs_raw)
+
+    if key:
+        input_cache.put(key, dhs_raw)
+    return dhs_raw
+
+
+# ================== CONCURRENT INGEST ==================
+# Procare ve DHS kolları reconcile'a kadar bağımsız; aynı anda okunur.
+# thread: ek maliyet yok, ama openpyxl saf Python (GIL) → kazanç sınırlı
+# process: gerçek paralel parse, process başlatma + sonuç pickle maliyeti var
+# auto: calamine (GIL'i bırakır, requirements'ta var) → thread, yoksa serial;
+#       bellek ölçümü açıksa serial (paralel aşamalarda peak_mb ölçülemez)
+INGEST_EXECUTORS = ("auto", "serial", "thread", "process")
+
+
+def resolve_ingest_executor(executor, engine, profile):
+    if isinstance(executor, str) and executor not in INGEST_EXECUTORS:
+        raise ValueError(
+            f"Unknown ingest executor: {executor!r} (expected one of {', '.join(INGEST_EXECUTORS)})"
+        )
+    # Açık seçim (string veya Executor) her zaman geçerli; sadece auto karar verir
+    if executor != "auto":
+        return executor
+    if profile.trace_memory:
+        return "serial"
+    return "thread" if engine_label(engine) == "calamine" else "serial"
+
+
+def _ingest_in_process(kind, source, input_cache, engine, stream_dhs=False):
+    # Worker process: kendi profili; aşama kayıtları ana profile eklenir
+    profile = PipelineProfile(trace_memory=False)
+    if kind == "procare":
+        result = load_procare_input(source, profile, input_cache, engine)
+    else:
+        result = load_dhs_input(source, profile, input_cache, engine, stream_dhs)
+    return result, profile.stages
+
+
+def _picklable(source):
+    # Yol olduğu gibi gider; file-like (UploadedFile vb.) bytes'a çevrilir
+    if isinstance(source, (str, bytes, os.PathLike)):
+        return source
+    return source_bytes(source)
+
+
+def ingest_inputs(procare_file, dhs_file, profile, input_cache=None, engine="auto",
+                  executor="auto", stream_dhs=False):
+    # → ((procare, procare_top_rows), dhs_raw); hata olan kolun exception'ı aynen yükselir
+    executor = resolve_ingest_executor(executor, engine, profile)
+    if executor == "serial":
+        return (
+            load_procare_input(procare_file, profile, input_cache, engine),
+            load_dhs_input(dhs_file, profile, input_cache, engine, stream_dhs),
+        )
+
+    if isinstance(executor, Executor):
+        pool, owned = executor, False
+    elif executor == "thread":
+        pool, owned = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ingest"), True
+    else:
+        pool, owned = ProcessPoolExecutor(max_workers=2), True
 
-    chosen = min(times) if pick == "min" else max(times)
-    return chosen.strftime("%H:%M")
+    try:
+        if isinstance(pool, ProcessPoolExecutor):
+            futures = [
+                pool.submit(
+                    _ingest_in_process, kind, _picklable(source), input_cache, engine, stream_dhs
+                )
+                for kind, source in (("procare", procare_file), ("dhs", dhs_file))
+            ]
+            results = []
+            for future in futures:
+                result, stages = future.result()
+                profile.merge(stages)
+                results.append(result)
+            return tuple(results)
+
+        with profile.parallel():
+            futures = [
+                pool.submit(load_procare_input, procare_file, profile, input_cache, engine),
+                pool.submit(load_dhs_input, dhs_file, profile, input_cache, engine, stream_dhs),
+            ]
+            return tuple(future.result() for future in futures)
+    finally:
+        if owned:
+            # Bir kol patladıysa diğeri beklenir ama başlamamış iş iptal edilir
+            pool.shutdown(wait=True, cancel_futures=True)
 
-# ================== SLOT WINDOWS ==================
-MORNING_START = parse_time("06:00")
-MORNING_END   = parse_time("07:50")
-AFTER_START   = parse_time("15:00")
-AFTER_END     = parse_time("18:30")
 
 # ==================================================
 # 🔥 MAIN ORCHESTRATION FUNCTION
@@ -86,246 +535,97 @@ AFTER_END     = parse_time("18:30")
 def run_pipeline(
     procare_file,
     dhs_file,
-    output_file
+    output_file,
+    profile=False,
+    progress=None,
+    input_cache=None,
+    engine="auto",
+    store=None,
+    ingest_executor="auto",
+    report_style="cells",
+    output_format="xlsx",
+    include_colors=False,
+    stream_dhs=False
 ):
-    # ---------- READ EXCELS (SADECE BURADA) ----------
-    procare_top_rows = pd.read_excel(procare_file, header=None, nrows=3)
-    procare_header = pd.read_excel(procare_file, header=None).iloc[0, 0]
-    df_procare_raw = pd.read_excel(procare_file, header=8)
-
-    df_dhs_raw = pd.read_excel(dhs_file, dtype=str)
-
-    # ---------- PROCESS ----------
-    procare = process_procare(df_procare_raw, procare_header).fillna("")
-    dhs_raw = process_dhs(df_dhs_raw).fillna("")
-
-    # ---------- NORMALIZE ----------
-    procare["StudentID"] = procare["StudentID"].astype(str).str.strip()
-    procare["Attdate"] = procare["Attdate"].astype(str).str.strip()
-
-    dhs_raw["StudentID"] = dhs_raw["StudentID"].astype(str).str.strip()
-    dhs_raw["Date"] = dhs_raw["Date"].astype(str).str.strip()
-
-    # ---------- NORMALIZE DHS ----------
-    dhs_rows = []
-
-    for (sid, date), g in dhs_raw.groupby(["StudentID", "Date"]):
-        dhs_rows.append({
-            "StudentID": sid,
-            "Date": date,
-            "FullName": g.iloc[0]["FullName"],
-
-            "Morning_IN": pick_time_dhs(g, "Morning_IN", "Morning_IN_Response", "min"),
-            "Morning_OUT": pick_time_dhs(g, "Morning_OUT", "Morning_OUT_Response", "max"),
-
-            "Afternoon_IN": pick_time_dhs(g, "Afternoon_IN", "Afternoon_IN_Response", "min"),
-            "Afternoon_OUT": pick_time_dhs(g, "Afternoon_OUT", "Afternoon_OUT_Response", "max"),
-
-            "Morning_IN_Response": " | ".join(g["Morning_IN_Response"].unique()),
-            "Morning_OUT_Response": " | ".join(g["Morning_OUT_Response"].unique()),
-            "Afternoon_IN_Response": " | ".join(g["Afternoon_IN_Response"].unique()),
-            "Afternoon_OUT_Response": " | ".join(g["Afternoon_OUT_Response"].unique()),
-        })
-
-    dhs = pd.DataFrame(dhs_rows)
-
-    # ---------- SLOT LOGIC ----------
-    def process_slot(p_row, d_row, slot, start, end):
-        p_in = p_row.get(f"{slot}_IN", "")
-        p_out = p_row.get(f"{slot}_OUT", "")
-
-        d_in = d_out = ""
-        if d_row is not None:
-            d_in = d_row.get(f"{slot}_IN", "")
-            d_out = d_row.get(f"{slot}_OUT", "")
-
-        final_in = p_in if p_in else d_in
-        final_out = p_out if p_out else d_out
-
-        has_procare_any = bool(p_in or p_out)
-        has_procare_complete = bool(p_in and p_out)
-        has_dhs_any = bool(d_in or d_out)
-        has_dhs_complete = bool(d_in and d_out)
-
-        if not has_procare_any:
-            if has_dhs_any:
-                return "Void Transaction", YELLOW, final_in, final_out
-            return "", None, "", ""
-
-        if p_in and not p_out and has_dhs_complete:
-            return "Update Procare", YELLOW, final_in, final_out
-
-        # if has_procare_any and not has_procare_complete:
-        #     if has_dhs_any:
-        #         return "Void Transaction", YELLOW, final_in, final_out
-        #     return "Not Swiped", RED, final_in, final_out
-
-        if has_procare_any and not has_procare_complete:
-            if has_dhs_any:
-                return "Void Transaction", YELLOW, final_in, final_out
-
-            return not_swiped_reason(d_in, d_out), RED, final_in, final_out
-
-
-        responses = []
-        if d_row is not None:
-            responses = [
-                d_row.get(f"{slot}_IN_Response", ""),
-                d_row.get(f"{slot}_OUT_Response", "")
-            ]
-
-        if all(is_dd(r) for r in responses if r):
-            return not_swiped_reason(d_in, d_out), RED, final_in, final_out
-
-        if not has_dhs_complete:
-            return not_swiped_reason(d_in, d_out), RED, final_in, final_out
+    # procare_file / dhs_file: yol, bytes veya file-like; output_file: yol veya yazılabilir file-like
+    # profile=True (veya PipelineProfile) → aşama süreleri / satırlar / bellek döner
+    # progress(stage, fraction, rows) → her aşamanın başında ve sonunda çağrılır
+    # input_cache (ParsedInputCache) → değişmeyen dosyalar Excel parse edilmeden gelir
+    # engine: "auto" (calamine varsa) / "calamine" / "default" (openpyxl/xlrd)
+    # store (open_day_store) → sadece değişen öğrenci-günler yeniden hesaplanır
+    # ingest_executor: "auto" / "serial" / "thread" / "process" ya da hazır bir Executor
+    #                  (bellek ölçümü açıksa her zaman serial)
+    # report_style: "cells" (hücre dolguları) / "conditional" (conditional formatting kuralları)
+    # output_format: "xlsx" (stilli rapor) / "csv" / "parquet" / "jsonl" (stilsiz tablo)
+    # include_colors: stilsiz tabloya slot renkleri düz kolon olarak eklenir
+    # stream_dhs: DHS sheet'i satır satır okunup katlanır (çok büyük exportlar için)
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}; expected one of {', '.join(OUTPUT_FORMATS)}")
+    if not isinstance(profile, PipelineProfile):
+        profile = PipelineProfile(enabled=bool(profile))
+    if progress is not None:
+        profile.progress = progress
+    profile.weights = profile.weights or STAGE_WEIGHTS
+    profile.start()
 
-        valid = in_range(p_in, start, end) and in_range(p_out, start, end)
-
-        if valid:
-            if any(is_b4(r) for r in responses):
-                return "Inform Parent", YELLOW, final_in, final_out
-            return "Swiped", GREEN, final_in, final_out
-
-        return "Void & Update Transaction", YELLOW, final_in, final_out
-
-    # ---------- MAIN LOOP ----------
-    rows = []
-    processed = set()
-
-    for _, p in procare.iterrows():
-        sid, date = p["StudentID"], p["Attdate"]
-        d_match = dhs[(dhs["StudentID"] == sid) & (dhs["Date"] == date)]
-        d_row = d_match.iloc[0] if not d_match.empty else None
-
-        m = process_slot(p, d_row, "Morning", MORNING_START, MORNING_END)
-        a = process_slot(p, d_row, "Afternoon", AFTER_START, AFTER_END)
-
-        rows.append({
-            "Full Name": p["Full Name"],
-            "StudentID": sid,
-            "Date": date,
-            "Morning_IN": m[2],
-            "Morning_OUT": m[3],
-            "Morning_Response": m[0],
-            "Afternoon_IN": a[2],
-            "Afternoon_OUT": a[3],
-            "Afternoon_Response": a[0],
-            "M_Color": m[1],
-            "A_Color": a[1]
-        })
-
-        processed.add((sid, date))
-
-    # ---------- DHS ONLY ----------
-    # ---------- DHS ONLY (ORİJİNAL DAVRANIŞ KORUNDU) ----------
-    for _, d in dhs.iterrows():
-        key = (d["StudentID"], d["Date"])
-        if key in processed:
-            continue
-
-        has_morning = bool(d["Morning_IN"] or d["Morning_OUT"])
-        has_afternoon = bool(d["Afternoon_IN"] or d["Afternoon_OUT"])
-
-        rows.append({
-            "Full Name": d["FullName"],
-            "StudentID": d["StudentID"],
-            "Date": d["Date"],
-
-            "Morning_IN": d["Morning_IN"] if has_morning else "",
-            "Morning_OUT": d["Morning_OUT"] if has_morning else "",
-            "Morning_Response": "Void Transaction" if has_morning else "",
-
-            "Afternoon_IN": d["Afternoon_IN"] if has_afternoon else "",
-            "Afternoon_OUT": d["Afternoon_OUT"] if has_afternoon else "",
-            "Afternoon_Response": "Void Transaction" if has_afternoon else "",
-
-            "M_Color": YELLOW if has_morning else None,
-            "A_Color": YELLOW if has_afternoon else None
-        })
-
-
-    # ---------- WRITE FINAL ----------
-    df = pd.DataFrame(rows)
-    df = df.sort_values(by="Full Name", kind="stable").reset_index(drop=True)
-
-    df.drop(columns=["M_Color", "A_Color"]).to_excel(output_file, index=False)
-
-    wb = load_workbook(output_file)
-    ws = wb.active
-
-    for i, row in df.iterrows():
-        r = i + 2
-
-        # if row["M_Color"]:
-        #     ws[f"D{r}"].fill = row["M_Color"]
-        #     ws[f"E{r}"].fill = row["M_Color"]
-
-        # if row["Morning_Response"] in COLOR_MAP:
-        #     ws[f"F{r}"].fill = COLOR_MAP[row["Morning_Response"]]
-
-        # if row["A_Color"]:
-        #     ws[f"G{r}"].fill = row["A_Color"]
-        #     ws[f"H{r}"].fill = row["A_Color"]
-
-        # if row["Afternoon_Response"] in COLOR_MAP:
-        #     ws[f"I{r}"].fill = COLOR_MAP[row["Afternoon_Response"]]
-
-        # ===== MORNING =====
-        mr = row["Morning_Response"]
-
-        if mr == "Not Swiped IN":
-            ws[f"D{r}"].fill = RED      # IN
-            ws[f"E{r}"].fill = GREEN    # OUT
-
-        elif mr == "Not Swiped OUT":
-            ws[f"D{r}"].fill = GREEN
-            ws[f"E{r}"].fill = RED
-
-        elif mr == "Not Swiped BOTH":
-            ws[f"D{r}"].fill = RED
-            ws[f"E{r}"].fill = RED
-
-        else:
-            if row["M_Color"]:
-                ws[f"D{r}"].fill = row["M_Color"]
-                ws[f"E{r}"].fill = row["M_Color"]
-
-        if mr in COLOR_MAP:
-            ws[f"F{r}"].fill = COLOR_MAP[mr]
-
-        # ===== AFTERNOON =====
-        ar = row["Afternoon_Response"]
-
-        if ar == "Not Swiped IN":
-            ws[f"G{r}"].fill = RED
-            ws[f"H{r}"].fill = GREEN
-
-        elif ar == "Not Swiped OUT":
-            ws[f"G{r}"].fill = GREEN
-            ws[f"H{r}"].fill = RED
-
-        elif ar == "Not Swiped BOTH":
-            ws[f"G{r}"].fill = RED
-            ws[f"H{r}"].fill = RED
-
-        else:
-            if row["A_Color"]:
-                ws[f"G{r}"].fill = row["A_Color"]
-                ws[f"H{r}"].fill = row["A_Color"]
-
-        if ar in COLOR_MAP:
-            ws[f"I{r}"].fill = COLOR_MAP[ar]
-
-            
-    ws.insert_rows(1, amount=3)
-
-    bold_font = Font(bold=True)
-
-    # procare ilk 3 satırı yaz + bold
-    for r in range(3):
-        for c, val in enumerate(procare_top_rows.iloc[r]):
-            cell = ws.cell(row=r + 1, column=c + 1, value=val)
-            cell.font = bold_font
-            
-    wb.save(output_file)
+    try:
+        # ---------- READ + PROCESS (SADECE BURADA, İKİ KOL AYNI ANDA) ----------
+        (procare, procare_top_rows), dhs_raw = ingest_inputs(
+            procare_file, dhs_file, profile, input_cache, engine, ingest_executor, stream_dhs
+        )
+
+        # ---------- NORMALIZE ----------
+        procare["StudentID"] = procare["StudentID"].astype(str).str.strip()
+        procare["Attdate"] = procare["Attdate"].astype(str).str.strip()
+
+        dhs_raw["StudentID"] = dhs_raw["StudentID"].astype(str).str.strip()
+        dhs_raw["Date"] = dhs_raw["Date"].astype(str).str.strip()
+
+        # ---------- NORMALIZE DHS ----------
+        with profile.stage("normalize_dhs", rows_in=len(dhs_raw)) as rec:
+            dhs = normalize_dhs(dhs_raw)
+            rec["rows_out"] = len(dhs)
+
+        # ---------- RECONCILE (STORE VARSA SADECE DEĞİŞEN GÜNLER) ----------
+        with store.session() if store is not None else nullcontext() as session:
+            procare_todo, dhs_todo = procare, dhs
+            if session is not None:
+                with profile.stage("diff_store", rows_in=len(procare) + len(dhs)) as rec:
+                    delta = session.diff(procare, dhs)
+                    procare_todo, dhs_todo = delta.procare, delta.dhs
+                    rec["rows_out"] = len(delta.days)
+
+            with profile.stage("reconcile", rows_in=len(procare_todo)) as rec:
+                matched = match_procare(procare_todo, dhs_todo)
+                rec["rows_out"] = len(matched)
+
+            with profile.stage("dhs_only", rows_in=len(dhs_todo)) as rec:
+                unmatched = dhs_only_rows(procare_todo, dhs_todo)
+                rec["rows_out"] = len(unmatched)
+
+            with profile.stage("assemble", rows_in=len(matched) + len(unmatched)) as rec:
+                if session is not None:
+                    # Rapor bu çalıştırmanın tüm öğrenci-günleri için store'dan kurulur
+                    session.save(delta, matched, unmatched)
+                    matched, unmatched = session.load(procare, dhs)
+                df = assemble_report(matched, unmatched)
+                rec["rows_out"] = len(df)
+
+        # ---------- WRITE FINAL ----------
+        with profile.stage("write_report", rows_in=len(df)) as rec:
+            if output_format == "xlsx":
+                write_report(df, procare_top_rows, output_file, style=report_style)
+            else:
+                write_table(df, output_file, output_format, colors=include_colors)
+            rec["rows_out"] = len(df)
+    finally:
+        profile.stop()
+
+    return profile if profile.enabled else None
+
+
+def run_pipeline_bytes(procare_file, dhs_file, **kwargs):
+    # Diske hiç dokunmadan: workbook (veya output_format tablosu) bytes olarak döner
+    buffer = io.BytesIO()
+    run_pipeline(procare_file, dhs_file, buffer, **kwargs)
+    return buffer.getvalue()
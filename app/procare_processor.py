@@ -1,14 +1,26 @@
+import numpy as np
 import pandas as pd
 import re
 
+from app.timeofday import as_minutes
+
+TIME_PATTERN = r"(\d{1,2}):(\d{2})\s*(AM|PM)"
+# Pivot kolon isimleri; kategori sırası = eski string sıralaması
+SLOT_COLUMNS = ["Afternoon_IN", "Afternoon_OUT", "Morning_IN", "Morning_OUT"]
+
+# Çıktı şekli / anlamı değişirse artırılmalı (parsed input cache anahtarı)
+PROCESSOR_VERSION = 1
+
 # --------------------------------------------------
-# Saat formatını ayıkla (08:05 AM gibi)
+# str.extract(TIME_PATTERN) parçaları → gece yarısından dakika
 # --------------------------------------------------
-def extract_time(val):
-    if pd.isna(val):
-        return None
-    match = re.search(r"(\d{1,2}:\d{2}\s*(AM|PM))", str(val))
-    return match.group(1) if match else None
+def _to_minutes(parts):
+    hour = pd.to_numeric(parts[0])
+    minute = pd.to_numeric(parts[1])
+    valid = hour.between(1, 12) & minute.between(0, 59)
+
+    minutes = (hour % 12) * 60 + minute + np.where(parts[2] == "PM", 12 * 60, 0)
+    return minutes.where(valid).to_numpy()
 
 
 def process_procare(df_raw: pd.DataFrame, header_text: str) -> pd.DataFrame:
@@ -58,105 +70,87 @@ def process_procare(df_raw: pd.DataFrame, header_text: str) -> pd.DataFrame:
     df.columns = new_cols
 
     # --------------------------------------------------
-    # 4️⃣ LONG FORMAT (RAW IN / OUT)
+    # 4️⃣ LONG FORMAT (RAW IN / OUT) — çocuk × gün, tek seferde
     # --------------------------------------------------
     in_cols = [c for c in df.columns if c.endswith("IN")]
-    records = []
-
-    for _, row in df.iterrows():
-        first = row.get("First Name")
-        last = row.get("Last Name")
-        student_id = row.get("External Student ID")
+    out_cols = [f"{c.replace(' IN', '')} OUT" for c in in_cols]
 
-        for in_col in in_cols:
-            base = in_col.replace(" IN", "")
-            day = base.split()[1].zfill(2)
-            out_col = f"{base} OUT"
+    n_rows, n_days = len(df), len(in_cols)
 
-            in_time = extract_time(row[in_col])
-            out_time = extract_time(row[out_col]) if out_col in df.columns else None
+    def column_or_none(name):
+        return df[name] if name in df.columns else pd.Series(None, index=df.index)
 
-            if pd.isna(in_time):
-                continue
+    first = column_or_none("First Name")
+    last = column_or_none("Last Name")
+    full_name = (first.fillna("") + " " + last.fillna("")).str.strip().str.upper()
 
-            attdate = f"{year}-{month_num:02d}-{day}"
+    # İsim / ID çocuk başına bir kez; gün satırları sadece kategori kodunu tekrarlar
+    full_name = pd.Categorical(full_name)
+    student_id = pd.Categorical(column_or_none("External Student ID"))
 
-            records.append({
-                "StudentID": student_id,
-                "First": first,
-                "Last": last,
-                "Attdate": attdate,
-                "IN": in_time,
-                "OUT": out_time
-            })
+    in_cells = pd.Series(df[in_cols].to_numpy(dtype=object).ravel()).astype(str)
+    out_cells = pd.Series(
+        df.reindex(columns=out_cols).to_numpy(dtype=object).ravel()
+    ).astype(str)
 
-    final_df = pd.DataFrame(records)
+    in_parts = in_cells.str.extract(TIME_PATTERN)
+    out_parts = out_cells.str.extract(TIME_PATTERN)
 
     # --------------------------------------------------
-    # 5️⃣ FULL NAME + DATETIME
+    # 5️⃣ TARİH + SAAT (dakika cinsinden)
     # --------------------------------------------------
-    final_df["Full Name"] = (
-        final_df["First"].fillna("") + " " + final_df["Last"].fillna("")
-    ).str.strip().str.upper()
-
-    final_df["Attdate"] = pd.to_datetime(final_df["Attdate"], errors="coerce")
-
-    final_df["IN_dt"] = pd.to_datetime(
-        final_df["Attdate"].dt.strftime("%Y-%m-%d") + " " + final_df["IN"],
+    days = [c.replace(" IN", "").split()[1].zfill(2) for c in in_cols]
+    day_dates = pd.to_datetime(
+        pd.Series([f"{year}-{month_num:02d}-{day}" for day in days], dtype=object),
         errors="coerce"
     )
 
-    final_df["OUT_dt"] = pd.to_datetime(
-        final_df["Attdate"].dt.strftime("%Y-%m-%d") + " " + final_df["OUT"],
-        errors="coerce"
-    )
-
-    # --------------------------------------------------
-    # 6️⃣ MORNING / AFTERNOON AYRIMI
-    # --------------------------------------------------
-    final_df["IN_Period"] = final_df["IN_dt"].dt.hour.apply(
-        lambda x: "Morning" if x < 12 else "Afternoon"
-    )
-
-    final_df["OUT_Period"] = final_df["OUT_dt"].dt.hour.apply(
-        lambda x: "Morning" if x < 12 else "Afternoon"
-    )
-
-    # --------------------------------------------------
-    # 7️⃣ LONG FORMAT (DHS STYLE)
-    # --------------------------------------------------
-    rows = []
-
-    for _, r in final_df.iterrows():
-        if pd.notna(r["IN_dt"]):
-            rows.append({
-                "Full Name": r["Full Name"],
-                "StudentID": r["StudentID"],
-                "Attdate": r["Attdate"],
-                "Column": f"{r['IN_Period']}_IN",
-                "Time": r["IN_dt"]
-            })
-
-        if pd.notna(r["OUT_dt"]):
-            rows.append({
-                "Full Name": r["Full Name"],
-                "StudentID": r["StudentID"],
-                "Attdate": r["Attdate"],
-                "Column": f"{r['OUT_Period']}_OUT",
-                "Time": r["OUT_dt"]
-            })
-
-    long_df = pd.DataFrame(rows)
+    long_df = pd.DataFrame({
+        "Full Name": pd.Categorical.from_codes(
+            np.repeat(full_name.codes, n_days), categories=full_name.categories
+        ),
+        "StudentID": pd.Categorical.from_codes(
+            np.repeat(student_id.codes, n_days), categories=student_id.categories
+        ),
+        "Attdate": np.tile(day_dates.to_numpy(), n_rows),
+        "IN": _to_minutes(in_parts),
+        "OUT": _to_minutes(out_parts),
+    })
+
+    # IN saati olmayan hücre kaydı hiç oluşturmaz
+    long_df = long_df[in_parts[0].notna().to_numpy() & long_df["Attdate"].notna().to_numpy()]
+    del df, in_cells, out_cells, in_parts, out_parts
+
+    # --------------------------------------------------
+    # 6️⃣ MORNING / AFTERNOON AYRIMI + 7️⃣ LONG FORMAT (DHS STYLE)
+    # --------------------------------------------------
+    # Column: SLOT_COLUMNS kategorisi (sıra = string sıralaması)
+    slots = []
+    for offset, kind in enumerate(("IN", "OUT")):
+        part = long_df[long_df[kind].notna()]
+        codes = np.where(part[kind] < 12 * 60, 2, 0) + offset
+        slots.append(pd.DataFrame({
+            "Full Name": part["Full Name"],
+            "StudentID": part["StudentID"],
+            "Attdate": part["Attdate"],
+            "Column": pd.Categorical.from_codes(codes, categories=SLOT_COLUMNS),
+            "Time": part[kind]
+        }))
+
+    long_df = pd.concat(slots, ignore_index=True)
+    del slots
 
     # --------------------------------------------------
     # 8️⃣ AYNI SLOT İÇİN EN ERKEN ZAMAN
     # --------------------------------------------------
     agg = (
         long_df
-        .groupby(["Full Name", "StudentID", "Attdate", "Column"])["Time"]
+        .groupby(["Full Name", "StudentID", "Attdate", "Column"], observed=True)["Time"]
         .min()
         .reset_index()
     )
+    del long_df
+    agg["Column"] = agg["Column"].astype(str)
 
     # --------------------------------------------------
     # 9️⃣ PIVOT (YAN YANA)
@@ -172,9 +166,11 @@ def process_procare(df_raw: pd.DataFrame, header_text: str) -> pd.DataFrame:
     # --------------------------------------------------
     for c in pivot_df.columns:
         if c.endswith("_IN") or c.endswith("_OUT"):
-            pivot_df[c] = pivot_df[c].dt.strftime("%H:%M")
+            pivot_df[c] = as_minutes(pivot_df[c])
 
     pivot_df["Attdate"] = pivot_df["Attdate"].dt.strftime("%m/%d/%Y")
+    pivot_df["Full Name"] = pivot_df["Full Name"].astype(object)
+    pivot_df["StudentID"] = pivot_df["StudentID"].astype(object)
 
     pivot_df = pivot_df.sort_values(by=["Full Name", "Attdate"])
 
@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# ==================================================
+# 🩺 PIPELINE PROFILE (aşama bazlı süre / satır / bellek)
+# ==================================================
+MB = 1024 * 1024
+
+
+class PipelineProfile:
+    def __init__(self, enabled=True, trace_memory=True, progress=None, weights=None):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.stages = []
+        self._owns_tracemalloc = False
+        self._started = None
+        self.wall_seconds = None
+
+        # Eşzamanlı ingest: aşamalar farklı thread'lerden kaydedilir
+        self._lock = threading.RLock()
+        self._parallel = 0
+
+        # progress(stage, fraction, rows): aşama başı (rows_in) ve sonu (rows_out)
+        self.progress = progress
+        self.weights = weights or {}
+        self._done_weight = 0.0
+
+    # ---------- LIFECYCLE ----------
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        self._started = time.perf_counter()
+        return self
+
+    def stop(self):
+        if self._started is not None:
+            self.wall_seconds = round(time.perf_counter() - self._started, 4)
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    # ---------- STAGES ----------
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        # with profile.stage("reconcile", rows_in=n) as s: ... s["rows_out"] = m
+        record = {"stage": name, "rows_in": rows_in, "rows_out": None}
+        self._report(name, rows_in)
+
+        if not self.enabled:
+            yield record
+            self._finish(name, record["rows_out"])
+            return
+
+        # tracemalloc peak process geneli; paralel aşamalarda aşamaya ait değil
+        track_memory = self.trace_memory and not self._parallel
+        if track_memory:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = round(time.perf_counter() - started, 4)
+            if track_memory:
+                record["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / MB, 2)
+            with self._lock:
+                self.stages.append(record)
+        self._finish(name, record["rows_out"])
+
+    @contextmanager
+    def parallel(self):
+        # Bu blok içindeki aşamalar aynı anda çalışabilir
+        with self._lock:
+            self._parallel += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._parallel -= 1
+
+    def merge(self, records):
+        # Başka process'te ölçülen aşamalar (ProcessPoolExecutor ingest)
+        for record in records:
+            with self._lock:
+                self.stages.append(record)
+            self._finish(record["stage"], record["rows_out"])
+
+    # ---------- PROGRESS ----------
+    def _fraction(self):
+        total = sum(self.weights.values())
+        return min(self._done_weight / total, 1.0) if total else 0.0
+
+    def _report(self, name, rows):
+        if self.progress is not None:
+            with self._lock:
+                self.progress(name, self._fraction(), rows)
+
+    def _finish(self, name, rows):
+        with self._lock:
+            self._done_weight += self.weights.get(name, 0)
+            self._report(name, rows)
+
+    # ---------- EXPORT ----------
+    def to_dict(self):
+        peaks = [s["peak_mb"] for s in self.stages if s.get("peak_mb") is not None]
+        return {
+            "total_seconds": round(sum(s["seconds"] for s in self.stages), 4),
+            # Eşzamanlı aşamalarda wall < toplam aşama süresi
+            "wall_seconds": self.wall_seconds,
+            "peak_mb": max(peaks) if peaks else None,
+            "slowest_stage": max(self.stages, key=lambda s: s["seconds"])["stage"] if self.stages else None,
+            "stages": self.stages,
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
@@ -0,0 +1,219 @@
+import importlib.util
+import io
+import time
+from contextlib import contextmanager
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# ================== PROCARE LAYOUT ==================
+PROCARE_BANNER_ROWS = 3   # rapor başlığı (bold olarak çıktıya kopyalanır)
+PROCARE_HEADER_ROW = 8    # kolon isimleri (Excel'de 9. satır)
+
+
+class ProcareWorkbook(NamedTuple):
+    top_rows: pd.DataFrame
+    header_text: str
+    data: pd.DataFrame
+    parse_seconds: float
+
+
+# ================== DHS STREAMING ==================
+STREAM_CHUNK_ROWS = 50_000          # her seferinde DataFrame'e alınan satır sayısı
+XLS_MAGIC = b"\xd0\xcf\x11\xe0"   # eski .xls (OLE2) dosya başı
+
+
+# ================== EXCEL ENGINE ==================
+# auto: python-calamine kuruluysa onu kullan, yoksa pandas varsayılanı
+# (xlsx → openpyxl, xls → xlrd). Çıktı iki yolda da aynı olacak şekilde normalize edilir.
+ENGINES = ("auto", "calamine", "default")
+
+
+def calamine_available():
+    # pandas engine="calamine" 2.2 ile geldi
+    pandas_version = tuple(int(part) for part in pd.__version__.split(".")[:2])
+    return pandas_version >= (2, 2) and importlib.util.find_spec("python_calamine") is not None
+
+
+def resolve_engine(engine="auto"):
+    # read_excel'e verilecek engine; None = pandas varsayılanı
+    if engine == "auto":
+        return "calamine" if calamine_available() else None
+    if engine == "calamine":
+        if not calamine_available():
+            raise ValueError("Excel engine 'calamine' needs python-calamine and pandas>=2.2")
+        return "calamine"
+    if engine == "default":
+        return None
+    raise ValueError(f"Unknown Excel engine: {engine!r} (expected one of {', '.join(ENGINES)})")
+
+
+def engine_label(engine="auto"):
+    return resolve_engine(engine) or "openpyxl/xlrd"
+
+
+# ================== HELPERS ==================
+def excel_source(source):
+    # Yol, bytes veya file-like (Streamlit UploadedFile) kabul edilir
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+def source_bytes(source):
+    # Hash'lemek için ham içerik; yol ise dosya okunur
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if hasattr(source, "read"):
+        source.seek(0)
+        return source.read()
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def _normalize_cells(df):
+    # calamine boş hücreleri "" ve sheet sonundaki boş satırları da döndürebilir;
+    # openpyxl/xlrd ile aynı olsun: "" → NaN, sondaki tamamen boş satırlar atılır
+    text = df.select_dtypes(include="object").columns
+    if len(text):
+        df[text] = df[text].replace("", np.nan)
+
+    filled = np.flatnonzero(df.notna().any(axis=1).to_numpy())
+    height = filled[-1] + 1 if len(filled) else 0
+    return df.iloc[:height]
+
+
+def read_excel(source, engine="auto", **kwargs):
+    # Procare ve DHS okumalarının tek giriş noktası
+    df = pd.read_excel(excel_source(source), engine=resolve_engine(engine), **kwargs)
+    return _normalize_cells(df)
+
+
+def _trim_trailing_empty_columns(df):
+    # read_excel(nrows=...) sadece dolu kolonlara kadar okur, aynısını yap
+    filled = np.flatnonzero(df.notna().any().to_numpy())
+    width = filled[-1] + 1 if len(filled) else 0
+    return df.iloc[:, :width]
+
+
+def _frame_from_header_row(raw, header_row):
+    # read_excel(header=N) ile aynı: boş hücreler "" → "Unnamed: i", tip çıkarımı
+    rows = raw.astype(object).where(raw.notna(), "").values.tolist()
+    return TextParser(rows, header=header_row, skip_blank_lines=False).read()
+
+
+# ==================================================
+# 📥 PROCARE (TEK OKUMA)
+# ==================================================
+def load_procare(procare_file, engine="auto"):
+    # Sheet bir kez parse edilir; banner, header text ve data aynı parse'dan çıkar
+    started = time.perf_counter()
+    raw = read_excel(procare_file, engine, header=None)
+    parse_seconds = time.perf_counter() - started
+
+    top_rows = _trim_trailing_empty_columns(raw.iloc[:PROCARE_BANNER_ROWS])
+    header_text = raw.iloc[0, 0]
+    data = _frame_from_header_row(raw, PROCARE_HEADER_ROW)
+
+    return ProcareWorkbook(top_rows, header_text, data, parse_seconds)
+
+
+# ==================================================
+# 📥 DHS
+# ==================================================
+def load_dhs(dhs_file, engine="auto"):
+    return read_excel(dhs_file, engine, dtype=str)
+
+
+# ==================================================
+# 📥 DHS (SATIR SATIR, SINIRLI BELLEK)
+# ==================================================
+# Çok aylık / çok merkezli DHS exportları tek DataFrame'e sığmayabilir.
+# Sheet read-only iterator ile okunur, hücreler read_excel(dtype=str) ile
+# aynı metne çevrilir ve chunk_rows satırlık parçalar halinde verilir.
+@contextmanager
+def _binary_stream(source):
+    # Yol → dosya açılır; bytes / file-like → excel_source
+    if isinstance(source, str) or hasattr(source, "__fspath__"):
+        with open(source, "rb") as f:
+            yield f
+    else:
+        yield excel_source(source)
+
+
+def _sheet_rows(stream, engine):
+    # İlk sheet'in satırları (değer tuple'ları)
+    if resolve_engine(engine) == "calamine":
+        from python_calamine import CalamineWorkbook
+
+        yield from CalamineWorkbook.from_filelike(stream).get_sheet_by_index(0).iter_rows()
+        return
+
+    is_xls = stream.read(len(XLS_MAGIC)) == XLS_MAGIC
+    stream.seek(0)
+    if is_xls:
+        # .xls en fazla 65.536 satır; xlrd zaten tüm dosyayı okur
+        frame = pd.read_excel(stream, header=None, dtype=object)
+        yield from frame.itertuples(index=False, name=None)
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _header_names(header):
+    # read_excel ile aynı: boş → "Unnamed: i", tekrar eden → "X.1"
+    names, seen = [], {}
+    for i, value in enumerate(header):
+        name = f"Unnamed: {i}" if value is None or value == "" else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _cell_text(value):
+    # read_excel(dtype=str) metni: boş → None, tam sayı float → "12"
+    if value is None or value == "":
+        return None
+    if isinstance(value, float):
+        if value != value:
+            return None
+        if value.is_integer():
+            return str(int(value))
+    return str(value)
+
+
+def iter_dhs_chunks(dhs_file, engine="auto", columns=None, chunk_rows=STREAM_CHUNK_ROWS):
+    # columns: sadece bu başlıklar (strip'lenmiş) okunur; None → hepsi
+    # En az bir (boş olabilir) chunk verilir
+    with _binary_stream(dhs_file) as stream:
+        rows = _sheet_rows(stream, engine)
+        header = next(rows, None)
+        names = _header_names(header or ())
+        picks = [
+            i for i, name in enumerate(names)
+            if columns is None or name.strip() in columns
+        ]
+        picked_names = [names[i] for i in picks]
+
+        batch = []
+        for row in rows:
+            width = len(row)
+            batch.append([_cell_text(row[i]) if i < width else None for i in picks])
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame(batch, columns=picked_names, dtype=object)
+                batch = []
+        yield pd.DataFrame(batch, columns=picked_names, dtype=object)
@@ -0,0 +1,66 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# ==================================================
+# 🗄️ REPORT CACHE (içerik hash'i → hazır workbook)
+# ==================================================
+# Aynı iki dosya + aynı slot pencereleri → aynı rapor. Process genelinde
+# paylaşılır (Streamlit'te st.cache_resource ile), bu yüzden thread-safe.
+MB = 1024 * 1024
+
+
+def cache_key(procare_bytes, dhs_bytes, windows, output=("xlsx", False)):
+    # output: (format, renk kolonu) — aynı girdiden farklı çıktı = farklı kayıt
+    digest = hashlib.sha256()
+    for part in (procare_bytes, dhs_bytes):
+        digest.update(hashlib.sha256(part).digest())
+    digest.update(repr(sorted(windows.items())).encode())
+    if output != ("xlsx", False):
+        digest.update(repr(tuple(output)).encode())
+    return digest.hexdigest()
+
+
+class ReportCache:
+    def __init__(self, max_entries=16, max_bytes=256 * MB):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key → (value, size)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size):
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+
+            # Tek başına sınırı aşan rapor cache'e girmez
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (value, size)
+            self._size += size
+
+            # LRU: en eski kullanılan baştan atılır
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size_bytes(self):
+        return self._size
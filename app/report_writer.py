@@ -0,0 +1,169 @@
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+from app.timeofday import format_minutes
+
+# ================== COLORS ==================
+GREEN = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
+RED = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
+YELLOW = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
+
+COLOR_MAP = {
+    "Swiped": GREEN,
+    "Not Swiped": RED,
+    "Void Transaction": YELLOW,
+    "Void & Update Transaction": YELLOW,
+    "Inform Parent": YELLOW,
+    "Update Procare": YELLOW,
+    "Not Swiped IN": RED,
+    "Not Swiped OUT": RED,
+    "Not Swiped BOTH": RED
+}
+
+# Eksik tarafı kırmızı, olan tarafı yeşil (IN, OUT)
+NOT_SWIPED_FILLS = {
+    "Not Swiped IN": (RED, GREEN),
+    "Not Swiped OUT": (GREEN, RED),
+    "Not Swiped BOTH": (RED, RED),
+}
+
+# ================== LAYOUT ==================
+REPORT_COLUMNS = [
+    "Full Name", "StudentID", "Date",
+    "Morning_IN", "Morning_OUT", "Morning_Response",
+    "Afternoon_IN", "Afternoon_OUT", "Afternoon_Response",
+]
+
+TIME_COLUMNS = ["Morning_IN", "Morning_OUT", "Afternoon_IN", "Afternoon_OUT"]
+
+BOLD_FONT = Font(bold=True)
+
+# pandas to_excel header stili ile aynı
+_THIN = Side(style="thin")
+HEADER_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="top")
+
+SHEET_NAME = "Sheet1"
+
+# "cells": her hücreye kendi dolgusu (varsayılan)
+# "conditional": data hücreleri stilsiz, renkler kolon başına birkaç
+#                conditional formatting kuralından gelir (küçük dosya, hızlı yazım)
+REPORT_STYLES = ("cells", "conditional")
+
+# Slot başına (IN, OUT, Response) kolon harfleri — REPORT_COLUMNS sırası
+SLOT_LETTERS = [("D", "E", "F"), ("G", "H", "I")]
+
+
+# ================== HELPERS ==================
+def slot_fills(response, color):
+    # (IN, OUT, Response) hücre dolguları
+    if response in NOT_SWIPED_FILLS:
+        in_fill, out_fill = NOT_SWIPED_FILLS[response]
+    else:
+        in_fill = out_fill = color
+    return in_fill, out_fill, COLOR_MAP.get(response)
+
+
+def _fill_groups(position):
+    # position: 0=IN, 1=OUT, 2=Response → [(fill, [response, ...])]
+    # slot_fills'ten türetilir; iki stil modu aynı tabloyu kullanır
+    groups = {}
+    for response, color in COLOR_MAP.items():
+        fill = slot_fills(response, color)[position]
+        if fill is not None:
+            groups.setdefault(id(fill), (fill, []))[1].append(response)
+    return list(groups.values())
+
+
+def _add_conditional_fills(ws, first_row, last_row):
+    for letters in SLOT_LETTERS:
+        response = f"${letters[2]}{first_row}"  # satır göreli, kolon sabit
+        for position, letter in enumerate(letters):
+            for fill, responses in _fill_groups(position):
+                tests = ",".join(f'{response}="{r}"' for r in responses)
+                ws.conditional_formatting.add(
+                    f"{letter}{first_row}:{letter}{last_row}",
+                    FormulaRule(formula=[f"OR({tests})"], fill=fill)
+                )
+
+
+def _cell(ws, value, fill=None, font=None, border=None, alignment=None):
+    if isinstance(value, float) and pd.isna(value):
+        value = None
+
+    cell = WriteOnlyCell(ws, value=value)
+    if fill is not None:
+        cell.fill = fill
+    if font is not None:
+        cell.font = font
+    if border is not None:
+        cell.border = border
+    if alignment is not None:
+        cell.alignment = alignment
+    return cell
+
+
+# ==================================================
+# 📊 STYLED REPORT (TEK GEÇİŞ)
+# ==================================================
+def write_report(df, top_rows, output_file, style="cells"):
+    # Banner, header ve data satırları sırayla yazılır; yeniden okuma / insert_rows yok
+    if style not in REPORT_STYLES:
+        raise ValueError(f"Unknown report style {style!r}; expected one of {', '.join(REPORT_STYLES)}")
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=SHEET_NAME)
+
+    # ---------- PROCARE BANNER (BOLD) ----------
+    for values in top_rows.itertuples(index=False):
+        ws.append([_cell(ws, v, font=BOLD_FONT) for v in values])
+
+    # ---------- HEADER ----------
+    ws.append([
+        _cell(ws, c, font=BOLD_FONT, border=HEADER_BORDER, alignment=HEADER_ALIGNMENT)
+        for c in REPORT_COLUMNS
+    ])
+
+    # ---------- DATA ----------
+    data = df[REPORT_COLUMNS + ["M_Color", "A_Color"]].copy()
+
+    # Dakikalar sadece burada "HH:MM" metnine çevrilir
+    for c in TIME_COLUMNS:
+        data[c] = format_minutes(data[c]).to_numpy()
+
+    if style == "conditional":
+        values = data[REPORT_COLUMNS].astype(object)
+        values = values.where(values.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            ws.append(row)
+
+        if len(values):
+            first_row = len(top_rows) + 2
+            _add_conditional_fills(ws, first_row, first_row + len(values) - 1)
+        wb.save(output_file)
+        return
+
+    for (name, sid, date,
+         m_in, m_out, m_resp,
+         a_in, a_out, a_resp,
+         m_color, a_color) in data.itertuples(index=False, name=None):
+
+        m_fills = slot_fills(m_resp, m_color)
+        a_fills = slot_fills(a_resp, a_color)
+
+        ws.append([
+            _cell(ws, name),
+            _cell(ws, sid),
+            _cell(ws, date),
+            _cell(ws, m_in, m_fills[0]),
+            _cell(ws, m_out, m_fills[1]),
+            _cell(ws, m_resp, m_fills[2]),
+            _cell(ws, a_in, a_fills[0]),
+            _cell(ws, a_out, a_fills[1]),
+            _cell(ws, a_resp, a_fills[2]),
+        ])
+
+    wb.save(output_file)
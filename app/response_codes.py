@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+# ==================================================
+# 🏷️ DHS RESPONSE KODLARI (bit flag)
+# ==================================================
+# Response metni ingest sırasında (process_dhs) bir kez parse edilir;
+# sonraki tüm kurallar sadece bu bitlere bakar. Yeni kod = yeni satır.
+FLAGS_DTYPE = np.uint8
+
+RESPONDED = 1 << 0        # boş olmayan herhangi bir cevap
+SA = 1 << 1               # (00) S/A — geçerli swipe
+B4 = 1 << 2               # (B4) Before Authorized Time
+DD = 1 << 3               # (DD) Duplicate Transaction
+CARD_NOT_ACTIVE = 1 << 4  # Card Not Active
+
+# bit → response metninde aranan desen
+RESPONSE_CODES = {
+    SA: r"\(00\)\s*S/A",
+    B4: r"\(B4\)",
+    DD: r"\(DD\)",
+    CARD_NOT_ACTIVE: r"Card Not Active",
+}
+ALL_FLAGS = [RESPONDED] + list(RESPONSE_CODES)
+
+
+def _text_flags(texts):
+    # texts: string Series (NaN olabilir) → FLAGS_DTYPE
+    texts = texts.fillna("").astype(str)
+    flags = np.where(texts != "", RESPONDED, 0).astype(FLAGS_DTYPE)
+    for bit, pattern in RESPONSE_CODES.items():
+        flags |= np.where(texts.str.contains(pattern, regex=True), bit, 0).astype(FLAGS_DTYPE)
+    return flags
+
+
+def response_flags(responses):
+    # Kategorik ise desenler sadece benzersiz cevaplarda çalışır
+    if isinstance(responses.dtype, pd.CategoricalDtype):
+        per_category = np.append(_text_flags(pd.Series(responses.cat.categories)), 0)
+        codes = responses.cat.codes.to_numpy()  # NaN → -1 → son eleman (0)
+        return pd.Series(per_category[codes], index=responses.index, dtype=FLAGS_DTYPE)
+    return pd.Series(_text_flags(responses), index=responses.index, dtype=FLAGS_DTYPE)
+
+
+def has_flag(flags, bit):
+    return (flags & bit) != 0
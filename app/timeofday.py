@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+# ==================================================
+# ⏱️ DAKİKA CİNSİNDEN SAAT (gece yarısından itibaren)
+# ==================================================
+# Pipeline içinde saatler int16 dakika olarak taşınır; "HH:MM" metni
+# sadece çıktı yazılırken bir kez üretilir.
+MINUTES_DTYPE = np.int16
+MISSING = -1
+
+
+def parse_hhmm(text):
+    # "06:00" → 360, geçersiz / boş → MISSING
+    try:
+        hours, minutes = str(text).split(":")
+        hours, minutes = int(hours), int(minutes)
+    except (TypeError, ValueError):
+        return MISSING
+
+    if not (0 <= hours <= 23 and 0 <= minutes <= 59):
+        return MISSING
+    return hours * 60 + minutes
+
+
+def from_datetimes(values):
+    # datetime64 Series → int16 dakika (NaT → MISSING)
+    minutes = values.dt.hour * 60 + values.dt.minute
+    return as_minutes(minutes)
+
+
+def as_minutes(values):
+    # float (NaN'lı) dakika → int16, NaN → MISSING
+    return values.fillna(MISSING).astype(MINUTES_DTYPE)
+
+
+def format_minutes(minutes):
+    # int dakika Series → "HH:MM", MISSING → ""
+    minutes = pd.Series(minutes)
+    valid = minutes != MISSING
+    m = minutes.where(valid, 0).astype(int)
+    text = (m // 60).astype(str).str.zfill(2) + ":" + (m % 60).astype(str).str.zfill(2)
+    return text.where(valid, "")
@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# ==================================================
+# ⏱️ STREAMLIT COLD START / RERUN BENCHMARK
+# ==================================================
+# python -m benchmarks.bench_app --repeat 5
+# Her ölçüm temiz bir Python process'inde: import maliyetleri dahil.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_FILE = os.path.join(ROOT, "app.py")
+
+HEAVY_MODULES = ["pandas", "numpy", "openpyxl", "pyarrow", "app.main"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+
+at = AppTest.from_file({app_file!r}, default_timeout=120)
+first_started = time.perf_counter()
+at.run()
+first = time.perf_counter() - first_started
+
+rerun_started = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - rerun_started
+
+print(json.dumps({{
+    "login_render_seconds": round(first, 4),
+    "login_rerun_seconds": round(rerun, 4),
+    "to_interactive_seconds": round(time.perf_counter() - started - rerun, 4),
+    "errors": [str(e.value) for e in at.exception],
+    "heavy_modules_loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure_login():
+    code = PROBE.format(app_file=APP_FILE, heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Login page render time of the Streamlit app.")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh processes to measure")
+    args = parser.parse_args(argv)
+
+    runs = [measure_login() for _ in range(args.repeat)]
+    for run in runs:
+        print(json.dumps(run))
+
+    best = min(runs, key=lambda r: r["login_render_seconds"])
+    print(
+        f"\nlogin render {best['login_render_seconds']:.3f}s  "
+        f"rerun {best['login_rerun_seconds']:.3f}s  "
+        f"to interactive {best['to_interactive_seconds']:.3f}s  "
+        f"heavy modules on login: {', '.join(best['heavy_modules_loaded']) or 'none'}"
+    )
+
+
+if __name__ == "__main__":
+    main()
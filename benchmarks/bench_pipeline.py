@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import platform
+from datetime import datetime
+
+import pandas as pd
+
+from app.exports import OUTPUT_FORMATS
+from app.main import INGEST_EXECUTORS, run_pipeline
+from app.profiling import PipelineProfile
+from app.readers import ENGINES, engine_label, resolve_engine
+from app.report_writer import REPORT_STYLES
+from benchmarks.synthetic import generate_pair
+
+# ==================================================
+# ⏱️ run_pipeline SCALING BENCHMARK
+# ==================================================
+# python -m benchmarks.bench_pipeline --sizes 50 200 1000
+# python -m benchmarks.bench_pipeline --engines default calamine
+# python -m benchmarks.bench_pipeline --compare benchmarks/results/<eski>.json
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(HERE, ".data")
+RESULTS_DIR = os.path.join(HERE, "results")
+
+DEFAULT_SIZES = [50, 200, 1000, 5000, 10000]
+
+
+def input_pair(n_children, n_days, swipes_per_day, seed):
+    # Aynı parametrelerle üretilen dosyalar tekrar kullanılır
+    os.makedirs(DATA_DIR, exist_ok=True)
+    stem = f"c{n_children}_d{n_days}_s{swipes_per_day}_r{seed}"
+    procare = os.path.join(DATA_DIR, f"{stem}_procare.xlsx")
+    dhs = os.path.join(DATA_DIR, f"{stem}_dhs.xlsx")
+
+    if not (os.path.exists(procare) and os.path.exists(dhs)):
+        generate_pair(procare, dhs, n_children, n_days, swipes_per_day, seed)
+    return procare, dhs
+
+
+def time_stages(procare_file, dhs_file, output_file, trace_memory=False, engine="auto",
+                ingest="serial", report_style="cells", output_format="xlsx", stream_dhs=False):
+    # tracemalloc süreleri şişirir; bellek ölçümü isteğe bağlı
+    profile = run_pipeline(
+        procare_file, dhs_file, output_file,
+        profile=PipelineProfile(trace_memory=trace_memory),
+        engine=engine,
+        ingest_executor=ingest,
+        report_style=report_style,
+        output_format=output_format,
+        stream_dhs=stream_dhs
+    )
+    summary = profile.to_dict()
+    stages = {s["stage"]: s for s in summary["stages"]}
+
+    seconds = {name: s["seconds"] for name, s in stages.items()}
+    # Eşzamanlı ingest'te aşama toplamı değil, duvar saati
+    seconds["total"] = summary["wall_seconds"]
+    rows = {
+        "procare_rows": stages["read_procare"]["rows_out"],
+        "dhs_rows": stages["read_dhs"]["rows_out"],
+        "report_rows": stages["write_report"]["rows_out"],
+        "report_kb": round(os.path.getsize(output_file) / 1024, 1),
+    }
+    if trace_memory:
+        rows["peak_mb"] = {name: s.get("peak_mb") for name, s in stages.items()}
+    return seconds, rows
+
+
+def run(sizes, n_days, swipes_per_day, seed, repeat, trace_memory=False, engines=("auto",),
+        ingest="serial", report_style="cells", output_format="xlsx", stream_dhs=False):
+    results = []
+    for n in sizes:
+        procare, dhs = input_pair(n, n_days, swipes_per_day, seed)
+        output = os.path.join(DATA_DIR, f"c{n}_report.{output_format}")
+
+        for engine in engines:
+            best = None
+            for _ in range(repeat):
+                stages, rows = time_stages(
+                    procare, dhs, output, trace_memory, engine, ingest, report_style, output_format,
+                    stream_dhs
+                )
+                if best is None or stages["total"] < best[0]["total"]:
+                    best = (stages, rows)
+
+            stages, rows = best
+            results.append({
+                "children": n, "days": n_days, "engine": engine_label(engine), "ingest": ingest,
+                "report_style": report_style, "format": output_format,
+                "stream_dhs": stream_dhs, **rows, "seconds": stages
+            })
+            _print_row(results[-1])
+    return results
+
+
+def _print_row(result):
+    stages = "  ".join(f"{k}={v:.3f}" for k, v in result["seconds"].items())
+    print(
+        f"{result['children']:>6} children  {result['dhs_rows']:>8} swipes  "
+        f"{result['engine']:<13} {stages}"
+    )
+
+
+def compare(current, previous_path):
+    with open(previous_path, encoding="utf-8") as f:
+        previous = {_result_key(r): r for r in json.load(f)["results"]}
+
+    print(f"\nvs {previous_path}")
+    for result in current:
+        old = previous.get(_result_key(result))
+        if not old:
+            continue
+        before, after = old["seconds"]["total"], result["seconds"]["total"]
+        print(
+            f"{result['children']:>6} children  {result['engine']:<13} "
+            f"{before:8.3f}s → {after:8.3f}s  ({before / after:5.2f}x)"
+        )
+
+
+def _result_key(result):
+    # Engine / stil / format kaydı olmayan eski sonuçlar pandas varsayılanı ve
+    # hücre dolgulu xlsx ile alınmıştı
+    return (
+        result["children"], result.get("engine", "openpyxl/xlrd"),
+        result.get("report_style", "cells"), result.get("format", "xlsx")
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stage timings of run_pipeline on synthetic inputs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--days", type=int, default=22)
+    parser.add_argument("--swipes", type=int, default=2, help="DHS swipes per child per day")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="keep the fastest of N runs")
+    parser.add_argument("--memory", action="store_true", help="also record peak traced memory per stage")
+    parser.add_argument(
+        "--engines", nargs="+", choices=ENGINES, default=["auto"],
+        help="Excel reader engines to time side by side"
+    )
+    parser.add_argument(
+        "--ingest", choices=INGEST_EXECUTORS, default="serial",
+        help="run the Procare and DHS ingest branches serially or concurrently"
+    )
+    parser.add_argument(
+        "--report-style", choices=REPORT_STYLES, default="cells",
+        help="per-cell fills or conditional formatting rules in the written report"
+    )
+    parser.add_argument(
+        "--format", choices=OUTPUT_FORMATS, default="xlsx",
+        help="styled Excel report or an unstyled csv / parquet / jsonl table"
+    )
+    parser.add_argument(
+        "--stream-dhs", action="store_true",
+        help="read the DHS sheet row by row (compare peak memory with --memory)"
+    )
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+    for engine in args.engines:
+        try:
+            resolve_engine(engine)
+        except ValueError as e:
+            parser.error(str(e))
+
+    results = run(
+        args.sizes, args.days, args.swipes, args.seed, args.repeat, args.memory, args.engines,
+        args.ingest, args.report_style, args.format, args.stream_dhs
+    )
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(RESULTS_DIR, f"{stamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": stamp,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "results": results,
+        }, f, indent=2)
+    print(f"\nresults → {path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
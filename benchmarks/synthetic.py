@@ -0,0 +1,168 @@
+import calendar
+import random
+from datetime import datetime
+
+from openpyxl import Workbook
+
+# ==================================================
+# 🧪 SENTETİK PROCARE / DHS EXPORTLARI
+# ==================================================
+# Gerçek exportlar çocuk PII içerdiği için paylaşılamıyor; bu modül aynı
+# düzende (Procare: banner + 9. satırda header, DHS: swipe listesi)
+# tekrarlanabilir dosyalar üretir.
+
+FIRST_NAMES = [
+    "Ava", "Liam", "Mia", "Noah", "Zoe", "Eli", "Ada", "Kai", "Ivy", "Leo",
+    "Ela", "Can", "Ece", "Ali", "Nia", "Omar", "Ruby", "Sam", "Tia", "Yusuf",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Brown", "Garcia", "Miller", "Davis", "Lopez", "Wilson",
+    "Yilmaz", "Kaya", "Demir", "Sahin", "Nguyen", "Patel", "Kim", "Walker",
+]
+
+SA = "(00) S/A"
+B4 = "(B4) Before Authorized Time"
+DD = "(DD) Duplicate Transaction"
+CARD_NOT_ACTIVE = "Card Not Active"
+
+# (cevap, ağırlık)
+RESPONSE_WEIGHTS = [(SA, 85), (B4, 6), (DD, 5), (CARD_NOT_ACTIVE, 4)]
+
+
+def make_children(n_children, seed=0):
+    rnd = random.Random(seed)
+    children = []
+    for i in range(n_children):
+        children.append({
+            "first": rnd.choice(FIRST_NAMES),
+            "last": f"{rnd.choice(LAST_NAMES)}{i}",
+            "case": f"{1000000 + i:07d}",
+            "person": f"{rnd.randint(1, 4):02d}",
+            # Tam gün / sadece sabah / sadece öğleden sonra
+            "schedule": rnd.choices(["full", "morning", "afternoon"], [6, 2, 2])[0],
+        })
+    return children
+
+
+def _attendance(child, rnd):
+    # (IN, OUT) datetime.time benzeri (saat, dakika) çiftleri; None = gelmedi
+    if rnd.random() < 0.08:
+        return None
+
+    if child["schedule"] == "morning":
+        start, end = (6, rnd.randint(0, 59)), (7, rnd.randint(30, 59))
+    elif child["schedule"] == "afternoon":
+        start, end = (15, rnd.randint(0, 59)), (rnd.choice([17, 18]), rnd.randint(0, 59))
+    else:
+        start, end = (rnd.choice([6, 7, 8]), rnd.randint(0, 59)), (rnd.choice([16, 17, 18]), rnd.randint(0, 59))
+
+    # Unutulmuş çıkış
+    if rnd.random() < 0.05:
+        end = None
+    return start, end
+
+
+def _ampm(hm):
+    hour, minute = hm
+    return f"{(hour - 1) % 12 + 1:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def build_month(n_children, n_days, swipes_per_day=2, seed=0, year=2026, month=3):
+    # Procare satırları ve DHS swipe'ları aynı senaryodan üretilir
+    rnd = random.Random(seed + 1)
+    children = make_children(n_children, seed)
+    n_days = min(n_days, calendar.monthrange(year, month)[1])
+
+    procare_rows, swipes = [], []
+    for child in children:
+        cells = []
+        for day in range(1, n_days + 1):
+            visit = _attendance(child, rnd)
+            if visit is None:
+                cells += [None, None]
+                continue
+
+            start, end = visit
+            cells += [_ampm(start), _ampm(end) if end else None]
+
+            # DHS: IN/OUT çifti + isteğe bağlı fazladan swipe
+            events = [("Check In", start)]
+            if end:
+                events.append(("Check Out", end))
+            for _ in range(max(0, swipes_per_day - len(events))):
+                events.append((
+                    rnd.choice(["Check In", "Check Out"]),
+                    (rnd.choice([6, 7, 15, 16, 17]), rnd.randint(0, 59))
+                ))
+
+            for trans, (hour, minute) in events:
+                if rnd.random() < 0.05:
+                    continue  # kart okutulmamış
+                response = rnd.choices(
+                    [r for r, _ in RESPONSE_WEIGHTS],
+                    [w for _, w in RESPONSE_WEIGHTS]
+                )[0]
+                swipes.append((
+                    child,
+                    datetime(year, month, day, hour, minute, rnd.randint(0, 59)),
+                    trans,
+                    response,
+                ))
+
+        procare_rows.append([child["first"], child["last"], f"{child['case']}/{child['person']}"] + cells)
+
+    return children, procare_rows, swipes, n_days
+
+
+# ================== WRITERS ==================
+def write_procare(path, procare_rows, n_days, year=2026, month=3):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+
+    month_name = calendar.month_name[month]
+    abbr = calendar.month_abbr[month]
+
+    ws.append([f"Attendance Report 01 {month_name}, {year} - {n_days:02d} {month_name}, {year}"])
+    ws.append(["Honeybee Learning Center"])
+    ws.append(["All Classrooms"])
+    for _ in range(5):
+        ws.append([])
+
+    header = ["First Name", "Last Name", "External Student ID"]
+    for day in range(1, n_days + 1):
+        header += [f"{abbr} {day:02d}", None]
+    ws.append(header)
+    ws.append([None, None, None] + ["IN", "OUT"] * n_days)
+
+    for row in procare_rows:
+        ws.append(row)
+
+    wb.save(path)
+
+
+def write_dhs(path, swipes):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+
+    ws.append(["Person Name", "Case #", "Person", "Date Time", "Trans Type", "Response"])
+    for child, when, trans, response in sorted(swipes, key=lambda s: s[1]):
+        ws.append([
+            f"{child['last']}, {child['first']}".upper(),
+            child["case"],
+            child["person"],
+            when.strftime("%m/%d/%Y %I:%M:%S %p"),
+            trans,
+            response,
+        ])
+
+    wb.save(path)
+
+
+def generate_pair(procare_path, dhs_path, n_children, n_days, swipes_per_day=2, seed=0,
+                  year=2026, month=3):
+    _, procare_rows, swipes, n_days = build_month(
+        n_children, n_days, swipes_per_day, seed, year, month
+    )
+    write_procare(procare_path, procare_rows, n_days, year, month)
+    write_dhs(dhs_path, swipes)
+    return {"procare_rows": len(procare_rows), "dhs_rows": len(swipes)}
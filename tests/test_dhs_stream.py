@@ -0,0 +1,59 @@
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+from openpyxl import Workbook
+
+from app.dhs_processor import DHS_COLUMNS, fold_swipes, pivot_swipes, process_dhs
+from app.readers import iter_dhs_chunks, load_dhs
+
+# Streaming (chunk chunk katlama) ile tek seferde okuma aynı tabloyu vermeli;
+# eşit saatli swipe'larda ikisi de dosyadaki ilk satırı seçer.
+SA = "(00) S/A"
+SA_DD = "(00) S/A | (DD) Duplicate Transaction"
+B4 = "(B4) Before Authorized Time"
+DD = "(DD) Duplicate Transaction"
+CARD_NOT_ACTIVE = "Card Not Active"
+
+STUDENTS = 300
+CHUNK_ROWS = 7
+
+
+def _write_dhs(path, rows):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(["Person Name", "Case #", "Person", "Date Time", "Trans Type", "Response"])
+    for name, case, when, trans, response in rows:
+        ws.append([name, case, "01", when.strftime("%m/%d/%Y %I:%M:%S %p"), trans, response])
+    wb.save(path)
+
+
+def _tied_rows(seed=0):
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(STUDENTS):
+        name, case = f"CHILD{i:03d}, TEST", f"{1000000 + i:07d}"
+        day = datetime(2026, 3, 1 + i % 5)
+        check_in = day + timedelta(hours=7, minutes=rnd.randint(0, 90))
+        check_out = day + timedelta(hours=15, minutes=rnd.randint(0, 90))
+
+        # Aynı saniyede farklı cevaplar: S/A yoksa ilk satırın cevabı,
+        # S/A varsa ilk S/A satırının cevabı seçilir
+        tied = rnd.sample([B4, DD, CARD_NOT_ACTIVE, SA, SA_DD], rnd.randint(2, 4))
+        rows += [(name, case, check_in, "Check IN", response) for response in tied]
+        rows += [(name, case, check_out, "Check OUT", rnd.choice([SA, SA_DD, DD]))
+                 for _ in range(rnd.randint(1, 3))]
+    rnd.shuffle(rows)
+    return rows
+
+
+def test_stream_matches_in_memory_on_ties(tmp_path):
+    path = tmp_path / "dhs.xlsx"
+    _write_dhs(path, _tied_rows())
+
+    in_memory = process_dhs(load_dhs(path))
+    candidates, rows = fold_swipes(iter_dhs_chunks(path, "default", DHS_COLUMNS, CHUNK_ROWS))
+    streamed = pivot_swipes(candidates)
+
+    assert rows == len(load_dhs(path))
+    pd.testing.assert_frame_equal(streamed, in_memory)
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from app.main import (
+    DHS_SLOTS, MORNING_END, MORNING_START, classify_slot, normalize_dhs, pick_time_dhs,
+    process_slot, slot_colors
+)
+from app.response_codes import B4, CARD_NOT_ACTIVE, DD, FLAGS_DTYPE, RESPONDED, SA
+from app.timeofday import MISSING
+
+# Referans (satır satır) kurallar ile vektörel hallerinin birebir aynı kalması
+ROWS = 20_000
+
+FLAG_CHOICES = np.array([
+    0,
+    RESPONDED,
+    RESPONDED | SA,
+    RESPONDED | B4,
+    RESPONDED | DD,
+    RESPONDED | CARD_NOT_ACTIVE,
+    RESPONDED | SA | B4,   # " | " ile birleşmiş cevaplar
+    RESPONDED | DD | B4,
+    RESPONDED | SA | DD,
+], dtype=FLAGS_DTYPE)
+
+# Pencere içi / dışı / sınırlar / eksik
+TIME_CHOICES = np.array([
+    MISSING, MISSING, MORNING_START, MORNING_END, MORNING_START - 1, MORNING_END + 1,
+    MORNING_START + 30, MORNING_END - 30, 900,
+])
+
+
+def _pick(rng, choices, n):
+    return choices[rng.integers(0, len(choices), n)]
+
+
+def _slot_frame(rng, n):
+    frame = pd.DataFrame({
+        "Morning_IN": _pick(rng, TIME_CHOICES, n),
+        "Morning_OUT": _pick(rng, TIME_CHOICES, n),
+        "d_Morning_IN": _pick(rng, TIME_CHOICES, n),
+        "d_Morning_OUT": _pick(rng, TIME_CHOICES, n),
+        "d_Morning_IN_Flags": _pick(rng, FLAG_CHOICES, n),
+        "d_Morning_OUT_Flags": _pick(rng, FLAG_CHOICES, n),
+    })
+    # Left join'de eşleşmeyen DHS satırı → d_ kolonları NaN
+    unmatched = rng.random(n) < 0.2
+    d_columns = [c for c in frame.columns if c.startswith("d_")]
+    frame[d_columns] = frame[d_columns].astype(float)
+    frame.loc[unmatched, d_columns] = np.nan
+    return frame, unmatched
+
+
+def test_classify_slot_matches_process_slot():
+    rng = np.random.default_rng(0)
+    frame, unmatched = _slot_frame(rng, ROWS)
+
+    response, final_in, final_out = classify_slot(frame, "Morning", MORNING_START, MORNING_END)
+    colors = slot_colors(response)
+
+    for i, row in enumerate(frame.to_dict("records")):
+        p_row = {"Morning_IN": int(row["Morning_IN"]), "Morning_OUT": int(row["Morning_OUT"])}
+        d_row = None if unmatched[i] else {
+            k[len("d_"):]: int(v) for k, v in row.items() if k.startswith("d_")
+        }
+
+        expected = process_slot(p_row, d_row, "Morning", MORNING_START, MORNING_END)
+        assert (response.iloc[i], colors[i], final_in.iloc[i], final_out.iloc[i]) == expected, row
+
+
+def test_normalize_dhs_matches_pick_time_dhs():
+    rng = np.random.default_rng(1)
+    groups = 1_500
+    sizes = rng.integers(1, 5, groups)  # grup başına 1-4 satır
+    n = sizes.sum()
+
+    dhs_raw = pd.DataFrame({
+        "StudentID": np.repeat([f"S{i}" for i in range(groups)], sizes),
+        "Date": "03/01/2026",
+        "FullName": np.repeat([f"Child {i}" for i in range(groups)], sizes),
+    })
+    for slot, _ in DHS_SLOTS:
+        dhs_raw[slot] = _pick(rng, TIME_CHOICES, n).astype(np.int16)
+        dhs_raw[f"{slot}_Response"] = ""
+        dhs_raw[f"{slot}_Flags"] = _pick(rng, FLAG_CHOICES, n)
+
+    normalized = normalize_dhs(dhs_raw).set_index("StudentID")
+
+    for student, rows in dhs_raw.groupby("StudentID"):
+        for slot, pick in DHS_SLOTS:
+            expected = pick_time_dhs(rows, slot, f"{slot}_Flags", pick)
+            assert normalized.at[student, slot] == expected, (student, slot)